@@ -0,0 +1,269 @@
+"""Local stand-in for the Karbon API with synthetic data.
+
+Serves Contacts, Users, Timesheets (with TimeEntries), Work/WorkItems,
+Clients and billing with OData-style ``value``/``@odata.nextLink`` paging,
+plus configurable response latency and 429 rate.
+
+    python -m benchmarks.fake_karbon --port 8765 --timesheets 2000
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+TASK_TYPES = ["Ad Hoc", "Bookkeeping", "Client Team Meetings", "Payroll", "Sales Tax", "Tax Return"]
+
+
+@dataclass
+class FakeConfig:
+    contacts: int = 500
+    users: int = 25
+    timesheets: int = 400
+    entries_per_timesheet: int = 20
+    work_items: int = 300
+    page_size: int = 100
+    latency_ms: float = 0.0
+    rate_429: float = 0.0
+    missing_client_rate: float = 0.05
+    start: date = date(2024, 1, 1)
+    seed: int = 42
+
+
+class Dataset:
+    """Deterministic synthetic Karbon data for one FakeConfig."""
+
+    def __init__(self, config: FakeConfig):
+        rng = random.Random(config.seed)
+        self.contacts = [
+            {"ContactKey": f"C{i:05d}", "FullName": f"Client {i}",
+             "ContactType": "Client" if i % 10 else "Prospect"}
+            for i in range(config.contacts)
+        ]
+        self.users = [{"Id": f"U{i:04d}", "Name": f"Worker {i}"} for i in range(config.users)]
+        self.work_items = [
+            {"WorkItemKey": f"W{i:05d}", "WorkKey": f"W{i:05d}", "Title": f"Engagement {i}",
+             "PrimaryStatus": rng.choice(["In Progress", "Completed", "Planned"]),
+             "BudgetedMinutes": rng.randrange(60, 6000, 15),
+             "ClientKey": self.contacts[i % len(self.contacts)]["ContactKey"]}
+            for i in range(config.work_items)
+        ]
+
+        self.timesheets = []
+        weeks = max(1, config.timesheets // max(1, config.users))
+        for i in range(config.timesheets):
+            user = self.users[i % len(self.users)]
+            week_start = config.start + timedelta(weeks=(i // len(self.users)) % weeks)
+            entries = []
+            for j in range(config.entries_per_timesheet):
+                if rng.random() < config.missing_client_rate:
+                    client_key = f"X{rng.randrange(50):05d}"  # referenced but not in Contacts
+                else:
+                    client_key = rng.choice(self.contacts)["ContactKey"]
+                work_item = rng.choice(self.work_items)
+                entries.append({
+                    "TimeEntryKey": f"E{i:06d}{j:03d}",
+                    "Date": f"{week_start + timedelta(days=j % 7)}T00:00:00Z",
+                    "ClientKey": client_key,
+                    "EntityKey": work_item["WorkKey"],
+                    "WorkItemKey": work_item["WorkItemKey"],
+                    "TaskTypeName": rng.choice(TASK_TYPES),
+                    "RoleName": "Staff",
+                    "Minutes": rng.randrange(15, 240, 15),
+                    "HourlyRate": 150.0,
+                    "BilledStatus": "Unbilled",
+                })
+            self.timesheets.append({
+                "TimesheetKey": f"T{i:06d}",
+                "UserKey": user["Id"],
+                "StartDate": f"{week_start}T00:00:00Z",
+                "EndDate": f"{week_start + timedelta(days=6)}T00:00:00Z",
+                "Status": "Submitted",
+                "TimeEntries": entries,
+            })
+
+        self.contacts_by_key = {c["ContactKey"]: c for c in self.contacts}
+        self.users_by_key = {u["Id"]: u for u in self.users}
+        self.work_items_by_key = {w["WorkItemKey"]: w for w in self.work_items}
+        self.timesheets_by_key = {t["TimesheetKey"]: t for t in self.timesheets}
+
+
+_FILTER_DATE = re.compile(r"(StartDate|EndDate) (ge|le) (\d{4}-\d{2}-\d{2})")
+_FILTER_TYPE = re.compile(r"ContactType eq '([^']+)'")
+
+
+def _filter_timesheets(timesheets, query):
+    # The service's startDate/endDate params select timesheets contained in the range;
+    # $filter supports any "StartDate|EndDate ge|le <date>" comparisons joined with "and"
+    conditions = []
+    if query.get("startDate"):
+        conditions.append(("StartDate", "ge", query["startDate"][0]))
+    if query.get("endDate"):
+        conditions.append(("EndDate", "le", query["endDate"][0]))
+    conditions += _FILTER_DATE.findall(query.get("$filter", [""])[0])
+    return [
+        t for t in timesheets
+        if all(t[field][:10] >= value if op == "ge" else t[field][:10] <= value for field, op, value in conditions)
+    ]
+
+
+class FakeKarbonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, keep-alive clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+    dataset: Dataset = None
+    config: FakeConfig = None
+    rng = random.Random(0)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _page(self, path, query, items):
+        skip = int(query.get("$skip", ["0"])[0])
+        top = int(query.get("$top", [self.config.page_size])[0])
+        body = {"value": items[skip:skip + top]}
+        if skip + top < len(items):
+            next_query = {k: v[0] for k, v in query.items()}
+            next_query["$skip"] = skip + top
+            host = self.headers.get("Host", "localhost")
+            body["@odata.nextLink"] = f"http://{host}{path}?{urlencode(next_query)}"
+        return body
+
+    def do_GET(self):
+        if self.config.latency_ms:
+            time.sleep(self.config.latency_ms / 1000)
+        if self.config.rate_429 and self.rng.random() < self.config.rate_429:
+            return self._send(429, {"error": "Too Many Requests"}, {"Retry-After": "0"})
+
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        segments = [s for s in parts.path.split("/") if s]
+        if len(segments) < 2:
+            return self._send(404)
+        collection, key = segments[1].lower(), segments[2] if len(segments) > 2 else None
+        data = self.dataset
+
+        if collection == "contacts":
+            if key:
+                contact = data.contacts_by_key.get(key)
+                return self._send(200, contact) if contact else self._send(404)
+            items = data.contacts
+            match = _FILTER_TYPE.search(query.get("$filter", [""])[0])
+            if match:
+                items = [c for c in items if c["ContactType"] == match.group(1)]
+            return self._send(200, self._page(parts.path, query, items))
+        if collection == "users":
+            if key:
+                user = data.users_by_key.get(key)
+                return self._send(200, {"Name": user["Name"]}) if user else self._send(404)
+            return self._send(200, self._page(parts.path, query, data.users))
+        if collection == "clients" and key:
+            contact = data.contacts_by_key.get(key)
+            return self._send(200, {"Name": contact["FullName"]}) if contact else self._send(404)
+        if collection == "timesheets":
+            if key:
+                timesheet = data.timesheets_by_key.get(key)
+                return self._send(200, timesheet) if timesheet else self._send(404)
+            return self._send(200, self._page(parts.path, query, _filter_timesheets(data.timesheets, query)))
+        if collection in ("work", "workitems"):
+            if key:
+                work_item = data.work_items_by_key.get(key)
+                return self._send(200, work_item) if work_item else self._send(404)
+            return self._send(200, self._page(parts.path, query, data.work_items))
+        if collection == "billing":
+            return self._send(200, [])
+        return self._send(404)
+
+
+class FakeKarbon:
+    """Runs FakeKarbonHandler on a background thread; use as a context manager."""
+
+    def __init__(self, config: FakeConfig = None, host="127.0.0.1", port=0):
+        self.config = config or FakeConfig()
+        handler = type("Handler", (FakeKarbonHandler,), {
+            "dataset": Dataset(self.config), "config": self.config, "rng": random.Random(self.config.seed),
+        })
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_config_arguments(parser):
+    defaults = FakeConfig()
+    parser.add_argument("--contacts", type=int, default=defaults.contacts)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--timesheets", type=int, default=defaults.timesheets)
+    parser.add_argument("--entries-per-timesheet", type=int, default=defaults.entries_per_timesheet)
+    parser.add_argument("--work-items", type=int, default=defaults.work_items)
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms,
+                        help="delay added to every response")
+    parser.add_argument("--rate-429", type=float, default=defaults.rate_429,
+                        help="fraction of requests answered with 429")
+    parser.add_argument("--missing-client-rate", type=float, default=defaults.missing_client_rate,
+                        help="fraction of time entries whose ClientKey is not a known contact")
+
+
+def config_from_args(args):
+    return FakeConfig(
+        contacts=args.contacts, users=args.users, timesheets=args.timesheets,
+        entries_per_timesheet=args.entries_per_timesheet, work_items=args.work_items,
+        page_size=args.page_size, latency_ms=args.latency_ms, rate_429=args.rate_429,
+        missing_client_rate=args.missing_client_rate,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic Karbon API data locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake = FakeKarbon(config_from_args(args), args.host, args.port)
+    print(f"Fake Karbon API listening on {fake.base_url} (Ctrl+C to stop)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Load test for the FastAPI service in old/main.py.
+
+Runs the app in DEBUG_MODE, so upstream Karbon calls are answered by its mock
+data generators, scaled up with ``--scale`` copies spread over the refresh
+window. Each endpoint is driven by ``--concurrency`` simultaneous clients
+through an in-process ASGI transport, reporting p50/p95/p99 latency,
+throughput and memory (peak Python allocations per request wave under
+tracemalloc, and the process's peak RSS so far).
+
+    python -m benchmarks.load --concurrency 1 --concurrency 10 --concurrency 50 --requests 500
+    python -m benchmarks.load --endpoint "/api/budget-to-actual?start_date={start}&end_date={end}" --json load.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows: no RSS high-water mark
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENDPOINTS = [
+    "/api/work-items",
+    "/api/timesheets",
+    "/api/timesheets?group_by=user,month",
+    "/api/budget-to-actual?start_date={start}&end_date={end}",
+    "/api/budget-to-actual?start_date={month_start}&end_date={end}",
+    "/api/budget-to-actual/batch?key_type=worker&keys=John%20Doe,Jane%20Smith&start_date={month_start}&end_date={end}",
+    "/api/rollup",
+]
+
+
+def _load_service(scale):
+    os.environ.setdefault("REFRESH_INTERVAL_SECONDS", "0")
+    os.environ.setdefault("REPORT_STORE_PATH", os.path.join(tempfile.gettempdir(), "karbon_load_reports.sqlite3"))
+    os.environ.setdefault("KARBON_QUOTA_RATE", "0")
+    os.environ.setdefault("KARBON_CACHE_TTL_SECONDS", "0")
+    sys.path.insert(0, os.path.join(ROOT, "old"))
+    import main as service
+
+    service.DEBUG_MODE = True
+    # Per-request INFO logging would dominate the timings
+    logging.disable(logging.INFO)
+
+    # Scale the mock generators: copy i of every item gets its own ids and a date i days back
+    today = date.today()
+    work_items = [
+        item.model_copy(update={"id": f"{item.id}-{i}"})
+        for i in range(scale) for item in service.get_mock_work_items()
+    ]
+    time_entries = [
+        entry.model_copy(update={"id": f"{entry.id}-{i}", "work_item_id": f"{entry.work_item_id}-{i}",
+                                 "date": today - timedelta(days=i % service.REFRESH_WINDOW_DAYS)})
+        for i in range(scale) for entry in service.get_mock_time_entries()
+    ]
+    billing = [
+        item.model_copy(update={"id": f"{item.id}-{i}"})
+        for i in range(scale) for item in service.get_mock_billing_data()
+    ]
+    service.get_mock_work_items = lambda: list(work_items)
+    service.get_mock_time_entries = lambda: list(time_entries)
+    service.get_mock_billing_data = lambda: list(billing)
+    return service
+
+
+def _percentile(ordered, pct):
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _drive(client, url, concurrency, requests):
+    latencies, statuses = [], {}
+    pending = iter(range(requests))
+
+    async def user():
+        for _ in pending:
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def _peak_allocated(client, url, concurrency):
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        await _drive(client, url, concurrency, concurrency)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+
+async def run(args):
+    import httpx
+
+    service = _load_service(args.scale)
+    await service.refresh_reports()
+    end = date.today()
+    dates = {
+        "start": end - timedelta(days=service.REFRESH_WINDOW_DAYS),
+        "month_start": end - timedelta(days=30),
+        "end": end,
+    }
+
+    results = []
+    transport = httpx.ASGITransport(app=service.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        for template in args.endpoint or DEFAULT_ENDPOINTS:
+            url = template.format(**dates)
+            await _drive(client, url, 1, args.warmup)
+            for concurrency in args.concurrency or [1, 10, 50]:
+                latencies, statuses, elapsed = await _drive(client, url, concurrency, args.requests)
+                ordered = sorted(latencies)
+                results.append({
+                    "endpoint": url,
+                    "concurrency": concurrency,
+                    "requests": len(latencies),
+                    "statuses": statuses,
+                    "p50_ms": _percentile(ordered, 50) * 1000,
+                    "p95_ms": _percentile(ordered, 95) * 1000,
+                    "p99_ms": _percentile(ordered, 99) * 1000,
+                    "throughput_rps": len(latencies) / elapsed,
+                    "peak_alloc_mb": await _peak_allocated(client, url, concurrency) / (1024 * 1024),
+                    "max_rss_mb": _max_rss_mb(),
+                })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the FastAPI service against its DEBUG_MODE mock data.")
+    parser.add_argument("--endpoint", action="append",
+                        help="URL to drive, may use {start}, {month_start} and {end}; may be repeated (default: report endpoints)")
+    parser.add_argument("--concurrency", type=int, action="append",
+                        help="simultaneous clients; may be repeated to trace a capacity curve (default: 1, 10, 50)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed requests per endpoint")
+    parser.add_argument("--scale", type=int, default=100, help="copies of each mock item")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON to PATH")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+
+    print(f"{'endpoint':<70} {'conc':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'alloc MB':>9} {'rss MB':>7}  statuses")
+    for row in results:
+        rss = f"{row['max_rss_mb']:7.1f}" if row["max_rss_mb"] is not None else f"{'-':>7}"
+        print(f"{row['endpoint'][:70]:<70} {row['concurrency']:>4} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+              f"{row['p99_ms']:8.1f} {row['throughput_rps']:8.1f} {row['peak_alloc_mb']:9.2f} {rss}  {row['statuses']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=4, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Offline benchmark harness against the local fake Karbon API.
+
+Times the budget scripts' main() paths and the FastAPI endpoints end to end.
+Each suite runs in its own interpreter because the scripts and the service
+each import their own ``config`` module.
+
+    python -m benchmarks.run --repeat 5 --timesheets 2000 --latency-ms 20
+    python -m benchmarks.run --suite scripts --json bench_results.json
+    python -m benchmarks.run --suite scripts --cassette fixtures/karbon.json.gz
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fake_karbon import FakeKarbon, add_config_arguments, config_from_args
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ["budgetv3", "budgetdata-optomize", "budgetdatav2", "zoom"]
+SERVICE_ENDPOINTS = [
+    "/api/work-items",
+    "/api/timesheets?start_date={start}&end_date={end}",
+    "/api/budget-to-actual?start_date={start}&end_date={end}",
+]
+BENCH_TOKEN = "bench-token"
+BENCH_ACCESS_KEY = "bench-access-key"
+
+
+def _summary(name, timings, **extra):
+    return {
+        "name": name,
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        **extra,
+    }
+
+
+def bench_scripts(args):
+    from karbon import http
+    from karbon.metrics import registry as metrics
+
+    results = []
+    with tempfile.TemporaryDirectory() as outdir:
+        for name in SCRIPTS:
+            script = importlib.import_module(name)
+            argv = [
+                "--start-date", args.start, "--end-date", args.end,
+                "--csv", os.path.join(outdir, f"{name}.csv"), "--json", os.path.join(outdir, f"{name}.json"),
+            ]
+            if args.cassette:
+                argv += ["--replay", args.cassette]
+            timings = []
+            for _ in range(args.repeat):
+                http.clear_cache()
+                started = time.perf_counter()
+                script.main(argv)
+                timings.append(time.perf_counter() - started)
+            requests = sum(stats["requests"] for stats in metrics.snapshot()["endpoints"].values())
+            results.append(_summary(name, timings, upstream_requests_last_run=requests))
+    return results
+
+
+def bench_service(args):
+    sys.path.insert(0, os.path.join(ROOT, "old"))
+    import main as service
+    from fastapi.testclient import TestClient
+
+    headers = {"Authorization": f"Bearer {BENCH_TOKEN}", "AccessKey": BENCH_ACCESS_KEY}
+    results = []
+    with TestClient(service.app, raise_server_exceptions=False) as client:
+        for template in SERVICE_ENDPOINTS:
+            url = template.format(start=args.start, end=args.end)
+            timings, size = [], 0
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(url, headers=headers)
+                timings.append(time.perf_counter() - started)
+                size = len(response.content)
+            results.append(_summary(url, timings, status=response.status_code, response_bytes=size))
+    return results
+
+
+SUITES = {"scripts": bench_scripts, "service": bench_service}
+
+
+# Run one suite in a child interpreter pointed at the fake server; it prints JSON results
+def _run_suite(suite, base_url, args):
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            KARBON_API_BASE_URL=base_url,
+            KARBON_BEARER_TOKEN=BENCH_TOKEN,
+            KARBON_ACCESS_KEY=BENCH_ACCESS_KEY,
+            VERBOSE_LOGGING="false",
+            REFRESH_INTERVAL_SECONDS="0",
+            REPORT_STORE_PATH=os.path.join(tempfile.gettempdir(), "karbon_bench_reports.sqlite3"),
+            # The host-wide request budget would cap throughput and the shared response cache would
+            # carry results across runs; opt in by exporting a rate or TTL
+            KARBON_QUOTA_RATE=os.environ.get("KARBON_QUOTA_RATE", "0"),
+            KARBON_CACHE_TTL_SECONDS=os.environ.get("KARBON_CACHE_TTL_SECONDS", "0"),
+            # 404s remembered by earlier runs would skip lookups and skew request counts
+            NEGATIVE_CACHE_PATH=os.path.join(scratch, "negative_cache.json"),
+        )
+        command = [sys.executable, "-m", "benchmarks.run", "--child", suite,
+                   "--repeat", str(args.repeat), "--start", args.start, "--end", args.end]
+        if args.cassette:
+            command += ["--cassette", os.path.abspath(args.cassette)]
+        completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{suite} suite failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the budget scripts and service against a fake Karbon API.")
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append",
+                        help="suite to run (default: all); may be repeated")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per target")
+    parser.add_argument("--start", default="2024-01-01", help="report start date")
+    parser.add_argument("--end", default="2024-12-31", help="report end date")
+    parser.add_argument("--json", metavar="PATH", help="also write results as JSON to PATH")
+    parser.add_argument("--cassette", metavar="PATH",
+                        help="replay script requests from an archive recorded with --record instead of the fake API")
+    parser.add_argument("--child", choices=sorted(SUITES), help=argparse.SUPPRESS)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(SUITES[args.child](args)))
+        return
+
+    results = {}
+    with FakeKarbon(config_from_args(args)) as fake:
+        for suite in args.suite or sorted(SUITES):
+            results[suite] = _run_suite(suite, fake.base_url, args)
+
+    for suite, rows in results.items():
+        print(f"\n{suite}")
+        for row in rows:
+            extras = ", ".join(f"{k}={v}" for k, v in row.items() if k not in ("name", "runs", "min_s", "median_s", "mean_s"))
+            print(f"  {row['name']:<60} median {row['median_s'] * 1000:9.1f} ms  "
+                  f"min {row['min_s'] * 1000:9.1f} ms  ({extras})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(config_from_args(args)), "results": results}, f, indent=4, default=str)
+
+
+if __name__ == "__main__":
+    main()
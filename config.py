@@ -8,12 +8,22 @@ load_dotenv()
 KARBON_BEARER_TOKEN = os.getenv("KARBON_BEARER_TOKEN")
 KARBON_ACCESS_KEY = os.getenv("KARBON_ACCESS_KEY")
 
-# Karbon API base URL
-KARBON_API_BASE_URL = "https://api.karbonhq.com"
+# Karbon API base URL (override to point at a local stand-in, e.g. benchmarks/fake_karbon.py)
+KARBON_API_BASE_URL = os.getenv("KARBON_API_BASE_URL", "https://api.karbonhq.com")
 
-# Date range for filtering timesheets (configurable)
+# Default date range for filtering timesheets; override with --start-date/--end-date, --range or --monthly
 START_DATE = "2024-10-10"  # Start of the date range (inclusive)
 END_DATE = "2024-10-31"    # End of the date range (inclusive)
 
 # Logging control
-VERBOSE_LOGGING = True  # Set to True for detailed logs
+VERBOSE_LOGGING = os.getenv("VERBOSE_LOGGING", "true").lower() == "true"  # Set to True for detailed logs
+
+# Per-key lookups that returned 404 are skipped until they expire
+NEGATIVE_CACHE_PATH = os.getenv("NEGATIVE_CACHE_PATH", ".karbon_negative_cache.json")
+NEGATIVE_CACHE_TTL_HOURS = float(os.getenv("NEGATIVE_CACHE_TTL_HOURS", "24"))
+
+# Host-wide Karbon request budget shared by the scripts and the service (rate 0 disables it);
+# the state file defaults to the system temp directory so every process on the host finds it
+KARBON_QUOTA_PATH = os.getenv("KARBON_QUOTA_PATH", "")
+KARBON_QUOTA_RATE = float(os.getenv("KARBON_QUOTA_RATE", "10"))  # requests per second
+KARBON_QUOTA_BURST = int(os.getenv("KARBON_QUOTA_BURST", "20"))
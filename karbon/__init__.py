@@ -0,0 +1,32 @@
+"""Shared Karbon API client: HTTP with retry and caching, pagination, fetch helpers and writers.
+
+Submodules are imported on first attribute access so ``import karbon`` stays cheap.
+"""
+import importlib
+
+_EXPORTS = {
+    "make_http_request": "karbon.http",
+    "iter_pages": "karbon.http",
+    "fetch_collection": "karbon.http",
+    "clear_cache": "karbon.http",
+    "fetch_timesheets": "karbon.fetch",
+    "fetch_contacts": "karbon.fetch",
+    "fetch_contacts_by_keys": "karbon.fetch",
+    "fetch_users": "karbon.fetch",
+    "fetch_all_users": "karbon.fetch",
+    "fetch_work_items": "karbon.fetch",
+    "process_data": "karbon.report",
+    "write_to_csv": "karbon.writers",
+    "write_to_json": "karbon.writers",
+    "log": "karbon.util",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'karbon' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
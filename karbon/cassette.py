@@ -0,0 +1,90 @@
+"""Record/replay of Karbon responses to a gzip-compressed JSON archive.
+
+In record mode every (method, endpoint) response that make_http_request
+settles on is kept and written out by save(). In replay mode responses are
+served from the archive with no network access at all, so report logic can be
+re-run in milliseconds and archives can serve as benchmark/test fixtures.
+"""
+import gzip
+import json
+import threading
+import time
+
+from karbon.util import log
+
+_lock = threading.Lock()
+_mode = None  # None, "record" or "replay"
+_path = None
+_responses = {}  # {(method, endpoint): (status, body)}
+
+
+class CassetteMiss(LookupError):
+    """Replay mode was asked for a request the archive does not contain."""
+
+
+def record(path):
+    global _mode, _path
+    with _lock:
+        _mode, _path = "record", path
+        _responses.clear()
+
+
+def replay(path):
+    global _mode, _path
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        archive = json.load(f)
+    with _lock:
+        _mode, _path = "replay", path
+        _responses.clear()
+        for item in archive["responses"]:
+            _responses[(item["method"], item["endpoint"])] = (item["status"], item["body"])
+    log(f"Replaying {len(_responses)} recorded responses from {path}.")
+
+
+def disable():
+    global _mode, _path
+    with _lock:
+        _mode, _path = None, None
+        _responses.clear()
+
+
+def active():
+    return _mode is not None
+
+
+def replaying():
+    return _mode == "replay"
+
+
+def lookup(method, endpoint):
+    with _lock:
+        try:
+            return _responses[(method, endpoint)]
+        except KeyError:
+            raise CassetteMiss(f"{method} {endpoint} is not in cassette {_path}") from None
+
+
+def store(method, endpoint, status, body):
+    if _mode != "record":
+        return
+    with _lock:
+        _responses[(method, endpoint)] = (status, body)
+
+
+# Write the recorded responses; a no-op unless recording
+def save():
+    with _lock:
+        if _mode != "record":
+            return
+        archive = {
+            "version": 1,
+            "recorded_at": time.time(),
+            "responses": [
+                {"method": method, "endpoint": endpoint, "status": status, "body": body}
+                for (method, endpoint), (status, body) in _responses.items()
+            ],
+        }
+        with gzip.open(_path, "wt", encoding="utf-8") as f:
+            json.dump(archive, f)
+        count = len(_responses)
+    log(f"Recorded {count} responses to {_path}.")
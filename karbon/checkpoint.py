@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+from karbon.util import log
+
+# Directory holding one JSON-lines file per paginated crawl; None disables checkpointing
+_directory = None
+
+
+class CrawlInterrupted(RuntimeError):
+    """A checkpointed crawl stopped on a failed page; rerun to resume it."""
+
+
+def enable(directory):
+    global _directory
+    os.makedirs(directory, exist_ok=True)
+    _directory = directory
+
+
+def disable():
+    global _directory
+    _directory = None
+
+
+def active():
+    return _directory is not None
+
+
+# Remove every checkpoint once a run has produced its outputs
+def clear_all():
+    if not _directory:
+        return
+    for name in os.listdir(_directory):
+        if name.endswith(".jsonl"):
+            os.remove(os.path.join(_directory, name))
+
+
+class Crawl:
+    """Pages already fetched for one endpoint plus the cursor to continue from.
+
+    Each fetched page is appended as one line so a crash loses at most the
+    page in flight; a torn final line is ignored on load.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        digest = hashlib.sha1(endpoint.encode("utf-8")).hexdigest()
+        self.path = os.path.join(_directory, f"{digest}.jsonl")
+        self.pages = []
+        self.next_link = endpoint
+        self.done = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record.get("done"):
+                    self.done = True
+                    self.next_link = None
+                else:
+                    self.pages.append(record["page"])
+                    self.next_link = record["next_link"]
+        if self.pages:
+            log(f"Resuming {self.endpoint} from checkpoint ({len(self.pages)} pages already fetched).")
+
+    def _append(self, record):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_page(self, page, next_link):
+        self.pages.append(page)
+        self.next_link = next_link
+        self._append({"page": page, "next_link": next_link})
+
+    def finish(self):
+        self.done = True
+        self.next_link = None
+        self._append({"done": True})
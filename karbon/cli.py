@@ -0,0 +1,179 @@
+import argparse
+import os
+import sys
+from datetime import date
+
+from config import START_DATE, END_DATE
+from karbon import cassette, checkpoint, delta, misses, negative_cache
+from karbon.metrics import registry as metrics
+from karbon.dates import monthly_ranges, parse_range
+from karbon.report import FIELDNAMES, SHARD_KEYS, VARIANTS, process_ranges
+from karbon.util import log
+from karbon.writers import write_to_csv, write_to_json
+
+
+def build_parser(variant="contacts", contact_type=None):
+    parser = argparse.ArgumentParser(description="Extract Karbon timesheet hours for budget-to-actual reporting.")
+    parser.add_argument("--variant", choices=VARIANTS, default=variant,
+                        help="contacts: match against the contact listing; work-items: budgets from /v3/Work; "
+                             "per-key: look up only the referenced contacts")
+    parser.add_argument("--contact-type", default=contact_type,
+                        help="restrict the contacts variant to one ContactType (e.g. Client)")
+    parser.add_argument("--start-date", default=START_DATE, help="inclusive start date, YYYY-MM-DD")
+    parser.add_argument("--end-date", default=END_DATE, help="inclusive end date, YYYY-MM-DD")
+    parser.add_argument("--range", dest="ranges", action="append", default=[], metavar="START:END",
+                        help="date range to extract, YYYY-MM-DD:YYYY-MM-DD; may be repeated")
+    parser.add_argument("--monthly", type=int, metavar="YEAR",
+                        help="extract one report per calendar month of YEAR")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent timesheet pulls and user lookups for batch runs (the contact crawl runs alongside)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="enrich timesheets in a pool of this many processes (for multi-year backfills)")
+    parser.add_argument("--shard-by", choices=SHARD_KEYS, default="user",
+                        help="how --processes partitions timesheets between workers")
+    parser.add_argument("--checkpoint-dir", metavar="DIR",
+                        help="persist pagination progress in DIR so a failed run resumes where it stopped")
+    cassette_mode = parser.add_mutually_exclusive_group()
+    cassette_mode.add_argument("--record", metavar="PATH",
+                               help="save every Karbon response to a compressed archive at PATH")
+    cassette_mode.add_argument("--replay", metavar="PATH",
+                               help="serve Karbon responses from an archive made with --record; no network")
+    parser.add_argument("--metrics-report", metavar="PATH",
+                        help="write request and stage timings for this run as JSON to PATH")
+    parser.add_argument("--delta", action="store_true",
+                        help="diff rows against the previous run, write a timestamped .changes.*.json changeset, "
+                             "and rewrite the full exports only when something changed")
+    parser.add_argument("--sqlite", metavar="PATH",
+                        help="also load the rows into an indexed SQLite database for `python -m karbon.query`")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="also write the rows as a memory-mappable binary snapshot for fast reloads")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile the run and write hot-function and memory reports next to the JSON output")
+    parser.add_argument("--csv", default="output_data.csv", help="CSV output path")
+    parser.add_argument("--json", default="output_data.json", help="JSON output path")
+    return parser
+
+
+# Resolve --range/--monthly/--start-date/--end-date into a list of (start, end) pairs
+def _date_ranges(parser, args):
+    ranges = []
+    try:
+        ranges.extend(parse_range(spec) for spec in args.ranges)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.monthly:
+        ranges.extend(monthly_ranges(args.monthly))
+    if ranges:
+        return ranges
+
+    # --start-date/--end-date get the same checks as --range
+    dates = []
+    for flag, value in (("--start-date", args.start_date), ("--end-date", args.end_date)):
+        try:
+            dates.append(date.fromisoformat(value))
+        except (TypeError, ValueError):
+            parser.error(f"Invalid {flag} {value!r}; expected YYYY-MM-DD")
+    start_date, end_date = dates
+    if end_date < start_date:
+        parser.error(f"Invalid date range '{args.start_date}:{args.end_date}'; end is before start")
+    return [(start_date.isoformat(), end_date.isoformat())]
+
+
+# Batch runs write one file pair per range, suffixed with the range
+def _output_path(path, date_range, batch):
+    if not batch:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{date_range[0]}_{date_range[1]}{ext}"
+
+
+# Main function to run the program; scripts pass their historical defaults
+def main(argv=None, variant="contacts", contact_type=None):
+    parser = build_parser(variant, contact_type)
+    args = parser.parse_args(argv)
+    ranges = _date_ranges(parser, args)
+    batch = len(ranges) > 1
+
+    if args.checkpoint_dir:
+        checkpoint.enable(args.checkpoint_dir)
+    else:
+        checkpoint.disable()
+    if args.record:
+        cassette.record(args.record)
+    elif args.replay:
+        cassette.replay(args.replay)
+    else:
+        cassette.disable()
+
+    profiler = None
+    if args.profile:
+        # cProfile, pstats and tracemalloc are only loaded for profiled runs
+        from karbon import profiling
+        profiler = profiling.RunProfiler()
+        profiler.start()
+
+    metrics.reset()
+    misses.reset()
+    log("Starting the process...")
+    try:
+        results = process_ranges(args.variant, ranges, args.contact_type, max_workers=args.workers,
+                                 processes=args.processes, shard_by=args.shard_by)
+        if profiler:
+            profiler.checkpoint("process_data")
+    except checkpoint.CrawlInterrupted as e:
+        negative_cache.save()
+        cassette.save()
+        sys.exit(f"{e} Progress is saved in '{args.checkpoint_dir}'.")
+    except cassette.CassetteMiss as e:
+        negative_cache.save()
+        sys.exit(f"Replay failed: {e}. Re-record the archive for this date range or run without --replay.")
+
+    negative_cache.save()
+    cassette.save()
+    misses.log_summary()
+
+    for date_range, data in results.items():
+        if not data:
+            log(f"No data to display for {date_range[0]} to {date_range[1]}.")
+            continue
+
+        if args.sqlite:
+            # sqlite3 is only loaded for runs that ask for the database
+            from karbon import query
+            query.load_rows(args.sqlite, data, *date_range)
+            log(f"Loaded {len(data)} rows into '{args.sqlite}'.")
+
+        fieldnames = FIELDNAMES[args.variant]
+        if args.snapshot:
+            from karbon import snapshot
+            snapshot_path = _output_path(args.snapshot, date_range, batch)
+            snapshot.write_snapshot(snapshot_path, data, fieldnames)
+            log(f"Snapshot of {len(data)} rows written to '{snapshot_path}'.")
+
+        csv_path = _output_path(args.csv, date_range, batch)
+        json_path = _output_path(args.json, date_range, batch)
+        changes = delta.prepare(data, fieldnames, json_path) if args.delta else None
+        if changes and not delta.needs_export(changes, json_path, csv_path):
+            log(f"No changes; '{csv_path}' and '{json_path}' are up to date.")
+            continue
+        write_to_csv(data, fieldnames, csv_path)
+        write_to_json(data, json_path, fieldnames)
+        if changes:
+            changeset = delta.commit(changes, json_path)
+            if changeset:
+                log(f"Changeset written to '{changeset}'.")
+
+        log(f"Data has been written to '{csv_path}' and '{json_path}'.")
+        if profiler:
+            profiler.checkpoint(f"writing {json_path}")
+
+    # Outputs are complete, so the next run should start from fresh data
+    checkpoint.clear_all()
+
+    if profiler:
+        profiler.stop()
+        profile_path, memory_path = profiler.write_reports(os.path.splitext(args.json)[0])
+        log(f"Profile written to '{profile_path}' and '{memory_path}'.")
+
+    if args.metrics_report:
+        metrics.write_report(args.metrics_report)
+        log(f"Run report written to '{args.metrics_report}'.")
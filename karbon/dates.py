@@ -0,0 +1,22 @@
+import calendar
+from datetime import date
+
+
+# Parse "YYYY-MM-DD:YYYY-MM-DD" into a (start, end) pair of ISO date strings
+def parse_range(spec):
+    try:
+        start, end = spec.split(":")
+        start_date, end_date = date.fromisoformat(start), date.fromisoformat(end)
+    except ValueError:
+        raise ValueError(f"Invalid date range {spec!r}; expected YYYY-MM-DD:YYYY-MM-DD")
+    if end_date < start_date:
+        raise ValueError(f"Invalid date range {spec!r}; end is before start")
+    return start_date.isoformat(), end_date.isoformat()
+
+
+# One (start, end) range per calendar month of the given year
+def monthly_ranges(year):
+    return [
+        (date(year, month, 1).isoformat(), date(year, month, calendar.monthrange(year, month)[1]).isoformat())
+        for month in range(1, 13)
+    ]
@@ -0,0 +1,92 @@
+"""Delta exports: diff this run's rows against the previous run's snapshot.
+
+Rows are keyed by their "_key" (TimesheetKey plus entry identity). The
+snapshot holds the exported columns per key; the changeset lists inserted,
+updated and deleted rows so downstream consumers can apply only the changes.
+
+Each run that changes something gets its own timestamped changeset, so a
+consumer that skips a run can still apply every delta in order. The snapshot
+is replaced only after the full exports are in place; if writing them fails,
+the next run diffs against the old snapshot again and rewrites them.
+"""
+import json
+import os
+import time
+
+from karbon.util import log
+
+
+def snapshot_path(json_path):
+    return f"{os.path.splitext(json_path)[0]}.snapshot.json"
+
+
+def changeset_path(json_path, generated_at):
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(generated_at))
+    return f"{os.path.splitext(json_path)[0]}.changes.{stamp}{int(generated_at * 1000) % 1000:03d}Z.json"
+
+
+def load_snapshot(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+# Compare current rows with a snapshot's {key: row}; O(n) with dict lookups
+def diff_rows(previous_rows, data, fieldnames):
+    current = {row["_key"]: {name: row[name] for name in fieldnames} for row in data}
+    inserted, updated = [], []
+    for key, row in current.items():
+        before = previous_rows.get(key)
+        if before is None:
+            inserted.append({"key": key, "row": row})
+        elif before != row:
+            updated.append({"key": key, "before": before, "after": row})
+    deleted = [{"key": key, "row": row} for key, row in previous_rows.items() if key not in current]
+    return current, {"inserted": inserted, "updated": updated, "deleted": deleted}
+
+
+# Diff data against the snapshot next to json_path; the result is passed to
+# needs_export and, once the exports are written, to commit
+def prepare(data, fieldnames, json_path):
+    previous = load_snapshot(snapshot_path(json_path))
+    current, changes = diff_rows(previous["rows"] if previous else {}, data, fieldnames)
+    counts = {kind: len(rows) for kind, rows in changes.items()}
+    log(f"Changes since previous run: {counts['inserted']} inserted, {counts['updated']} updated, "
+        f"{counts['deleted']} deleted.")
+    return {"previous": previous, "current": current, "changes": changes, "counts": counts}
+
+
+def _changed(delta):
+    return any(delta["counts"].values()) or delta["previous"] is None
+
+
+# True when the full exports need rewriting: rows changed or an export is missing
+def needs_export(delta, json_path, csv_path):
+    return _changed(delta) or not (os.path.exists(json_path) and os.path.exists(csv_path))
+
+
+# Publish the changeset and the new snapshot; call only after the exports are in place
+def commit(delta, json_path):
+    if not _changed(delta):
+        return None
+    generated_at = time.time()
+    path = None
+    if any(delta["counts"].values()):
+        previous = delta["previous"]
+        path = changeset_path(json_path, generated_at)
+        _write_json(path, {
+            "generated_at": generated_at,
+            "previous_snapshot_at": previous["generated_at"] if previous else None,
+            "counts": delta["counts"],
+            **delta["changes"],
+        })
+    _write_json(snapshot_path(json_path), {"generated_at": generated_at, "rows": delta["current"]})
+    return path
@@ -0,0 +1,137 @@
+from urllib.parse import quote
+
+from config import START_DATE, END_DATE
+from karbon import cassette, negative_cache
+from karbon.http import request_json, fetch_collection, iter_pages
+from karbon.metrics import registry as metrics
+from karbon.util import log, progress
+
+
+# GET a single entity, skipping endpoints recently known to return 404.
+# Recording and replaying bypass the skip so cassettes hold every lookup.
+def _lookup(endpoint):
+    if not cassette.active() and negative_cache.is_missing(endpoint):
+        return None
+    status, data = request_json("GET", endpoint)
+    if status == 404:
+        negative_cache.mark_missing(endpoint)
+    return data
+
+
+# Build the Timesheets endpoint for a date range (inclusive, UTC). It selects every
+# timesheet overlapping the range, including weeks that straddle either end;
+# report.build_rows clips their entries to the range by entry date.
+def timesheets_endpoint(start_date=START_DATE, end_date=END_DATE):
+    start = f"{start_date}T00:00:00Z"
+    end = f"{end_date}T23:59:59Z"
+    filter_query = quote(f"EndDate ge {start} and StartDate le {end}", safe='')
+    return f"/v3/Timesheets?$filter={filter_query}&$expand=TimeEntries"
+
+
+# Fetch timesheets to get actual hours, filtered by date range.
+# on_page, if given, is called with each page's timesheets as soon as it arrives.
+@metrics.timed("fetch_timesheets")
+def fetch_timesheets(start_date=START_DATE, end_date=END_DATE, on_page=None):
+    log(f"Fetching timesheets from {start_date} to {end_date}...")
+    timesheets = []
+    for page in iter_pages(timesheets_endpoint(start_date, end_date)):
+        items = page.get("value", [])
+        timesheets.extend(items)
+        if on_page:
+            on_page(items)
+    if timesheets:
+        log(f"Fetched {len(timesheets)} timesheets for the specified date range.")
+    else:
+        log("No timesheets found for the specified date range.")
+    return timesheets
+
+
+# Fetch all contacts, optionally restricted to one ContactType, following pagination
+@metrics.timed("fetch_contacts")
+def fetch_contacts(contact_type=None):
+    endpoint = "/v3/Contacts"
+    if contact_type:
+        log(f"Fetching all contacts with ContactType '{contact_type}'...")
+        endpoint += "?$filter=" + quote(f"ContactType eq '{contact_type}'", safe='')
+    else:
+        log("Fetching all contacts...")
+
+    contacts = {}
+    for contact in fetch_collection(endpoint):
+        contacts[contact["ContactKey"]] = contact["FullName"]
+
+    log(f"Fetched {len(contacts)} contacts.")
+    return contacts
+
+
+# Fetch a single contact's name by ContactKey
+def fetch_contact_by_key(contact_key):
+    contact_data = _lookup(f"/v3/Contacts/{contact_key}")
+    return contact_data.get("FullName") if contact_data else None
+
+
+# Fetch contacts individually by ClientKeys
+@metrics.timed("fetch_contacts_by_keys")
+def fetch_contacts_by_keys(client_keys):
+    log("Fetching contacts individually by ClientKeys...")
+    clients = {}
+    for client_key in progress(client_keys, desc="Fetching contacts"):
+        clients[client_key] = fetch_contact_by_key(client_key) or "Unknown Client"
+    log(f"Total contacts fetched: {len(clients)}")
+    return clients
+
+
+# Fetch a single user's name by UserKey
+def fetch_user_name(user_key):
+    user_data = _lookup(f"/v3/Users/{user_key}")
+    return user_data.get("Name", "Unknown User") if user_data else "Unknown User"
+
+
+# Fetch users individually by UserKey
+@metrics.timed("fetch_users")
+def fetch_users(user_keys):
+    log("Fetching users individually...")
+    users = {}
+    with progress(total=len(user_keys), desc="Fetching users") as pbar:
+        for user_key in user_keys:
+            users[user_key] = fetch_user_name(user_key)
+            pbar.update(1)
+    return users
+
+
+# Fetch all users in one paginated listing
+@metrics.timed("fetch_all_users")
+def fetch_all_users():
+    log("Fetching all users...")
+    users = {user["Id"]: user["Name"] for user in fetch_collection("/v3/Users")}
+    log(f"Fetched {len(users)} users.")
+    return users
+
+
+# Fetch work items to get budgeted hours
+@metrics.timed("fetch_work_items")
+def fetch_work_items():
+    log("Fetching work items...")
+    work_items = fetch_collection("/v3/Work")
+    log(f"Fetched {len(work_items)} work items.")
+    return work_items
+
+
+# Helper function to fetch client name
+def get_client_name(client_key):
+    if not client_key:
+        return "Unknown Client"
+    client_data = _lookup(f"/v3/Clients/{client_key}")
+    if client_data:
+        return client_data.get("Name", "Unknown Client")
+    return "Unknown Client"
+
+
+# Helper function to fetch user (worker) name
+def get_user_name(user_key):
+    if not user_key:
+        return "Unknown Worker"
+    user_data = _lookup(f"/v3/Users/{user_key}")
+    if user_data:
+        return user_data.get("Name", "Unknown Worker")
+    return "Unknown Worker"
@@ -0,0 +1,198 @@
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from config import (
+    KARBON_BEARER_TOKEN, KARBON_ACCESS_KEY, KARBON_API_BASE_URL,
+    KARBON_QUOTA_PATH, KARBON_QUOTA_RATE, KARBON_QUOTA_BURST,
+)
+from karbon import cassette, checkpoint, quota
+from karbon.metrics import registry as metrics
+from karbon.util import log
+
+API_BASE_URL = urlsplit(KARBON_API_BASE_URL).netloc
+_CONNECTION_CLASS = http.client.HTTPConnection if KARBON_API_BASE_URL.startswith("http://") else http.client.HTTPSConnection
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Host-wide request budget shared with the service; the scripts draw on it as batch callers
+_quota = quota.open_bucket(KARBON_QUOTA_PATH, KARBON_QUOTA_RATE, KARBON_QUOTA_BURST)
+
+# One keep-alive connection per thread instead of a new TLS handshake per request
+_local = threading.local()
+
+# GET responses keyed by endpoint, shared by every fetch_* helper in the process
+_response_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _get_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _CONNECTION_CLASS(API_BASE_URL)
+        _local.conn = conn
+    return conn
+
+
+def _drop_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+# Send one request on the thread's connection. A keep-alive socket the server
+# has since closed fails as soon as it is reused; idempotent requests are then
+# resent at once on a fresh connection, without backoff or a retry
+def _request_once(method, endpoint, headers):
+    conn = _get_connection()
+    reused = conn.sock is not None
+    try:
+        conn.request(method, endpoint, headers=headers)
+        response = conn.getresponse()
+        return response, response.read()
+    except (OSError, http.client.HTTPException):
+        _drop_connection()
+        if not reused or method not in ("GET", "HEAD"):
+            raise
+    conn = _get_connection()
+    conn.request(method, endpoint, headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def clear_cache():
+    with _cache_lock:
+        _response_cache.clear()
+
+
+# Helper function to make HTTP requests, retrying rate limits and server errors
+def make_http_request(method, endpoint, retries=3, backoff_factor=1.0, use_cache=True):
+    return request_json(method, endpoint, retries, backoff_factor, use_cache)[1]
+
+
+# Like make_http_request, but returns (status, parsed body or None); status is
+# None when every attempt failed at the network level
+def request_json(method, endpoint, retries=3, backoff_factor=1.0, use_cache=True):
+    cacheable = use_cache and method == "GET"
+    if cacheable:
+        with _cache_lock:
+            if endpoint in _response_cache:
+                return 200, _response_cache[endpoint]
+
+    if cassette.replaying():
+        status, result = cassette.lookup(method, endpoint)
+    else:
+        status, result = _send_with_retries(method, endpoint, retries, backoff_factor)
+        cassette.store(method, endpoint, status, result)
+
+    if cacheable and status == 200:
+        with _cache_lock:
+            _response_cache[endpoint] = result
+    return status, result
+
+
+def _send_with_retries(method, endpoint, retries, backoff_factor):
+    headers = {
+        'AccessKey': KARBON_ACCESS_KEY,
+        'Authorization': f'Bearer {KARBON_BEARER_TOKEN}',
+        'Content-Type': 'application/json'
+    }
+
+    status = None
+    for attempt in range(retries):
+        if attempt:
+            metrics.record_retry(endpoint)
+        if _quota:
+            _quota.acquire(quota.BATCH)
+        started = time.perf_counter()
+        try:
+            response, raw = _request_once(method, endpoint, headers)
+        except (OSError, http.client.HTTPException) as e:
+            metrics.record_request(endpoint, "error", time.perf_counter() - started, 0)
+            # Failed on a fresh connection: a real network error, so back off before the next one
+            _drop_connection()
+            wait_time = backoff_factor * (2 ** attempt)
+            log(f"Request to {endpoint} failed ({e}). Retrying in {wait_time} seconds...")
+            time.sleep(wait_time)
+            continue
+        metrics.record_request(endpoint, response.status, time.perf_counter() - started, len(raw))
+        status = response.status
+        data = raw.decode('utf-8')
+
+        if response.getheader("Connection", "").lower() == "close":
+            _drop_connection()
+
+        # Log raw response for debugging only if verbose logging is enabled
+        log(f"Raw response from {endpoint}: {data}")
+
+        if response.status == 200:
+            return status, json.loads(data)
+        elif response.status in RETRY_STATUSES:
+            retry_after = response.getheader("Retry-After")
+            wait_time = float(retry_after) if retry_after and retry_after.isdigit() else backoff_factor * (2 ** attempt)
+            if _quota and response.status == 429:
+                _quota.backoff(wait_time)
+            log(f"Rate limit exceeded or server error ({response.status}). Retrying in {wait_time} seconds...")
+            time.sleep(wait_time)
+        else:
+            log(f"Failed to fetch data from {endpoint}: {response.status}, {response.reason}")
+            return status, None
+
+    log(f"Failed to fetch data from {endpoint} after {retries} retries.")
+    return status, None
+
+
+# Normalise an @odata.nextLink into a path on API_BASE_URL
+def _relative_link(next_link):
+    if not next_link:
+        return None
+    if next_link.startswith("https://") or next_link.startswith("http://"):
+        parts = urlsplit(next_link)
+        next_link = parts.path + (f"?{parts.query}" if parts.query else "")
+    if not next_link.startswith('/'):
+        next_link = '/' + next_link
+    return next_link
+
+
+# Yield each page of an OData collection, following @odata.nextLink.
+# With checkpointing enabled, pages are persisted as they arrive and a rerun
+# replays them before continuing from the saved cursor.
+def iter_pages(endpoint):
+    if checkpoint.active():
+        yield from _iter_pages_checkpointed(endpoint)
+        return
+
+    next_link = endpoint
+    while next_link:
+        page = make_http_request("GET", next_link)
+        if not page:
+            log(f"Failed to fetch page {next_link}.")
+            return
+        yield page
+        next_link = _relative_link(page.get("@odata.nextLink"))
+
+
+def _iter_pages_checkpointed(endpoint):
+    crawl = checkpoint.Crawl(endpoint)
+    yield from crawl.pages
+
+    while crawl.next_link:
+        page = make_http_request("GET", crawl.next_link)
+        if not page:
+            # Stop the run rather than produce output from a partial crawl
+            raise checkpoint.CrawlInterrupted(f"Failed to fetch page {crawl.next_link}; rerun to resume.")
+        crawl.record_page(page, _relative_link(page.get("@odata.nextLink")))
+        yield page
+
+    if not crawl.done:
+        crawl.finish()
+
+
+# Fetch every item of an OData collection across all pages
+def fetch_collection(endpoint):
+    items = []
+    for page in iter_pages(endpoint):
+        items.extend(page.get("value", []))
+    return items
@@ -0,0 +1,157 @@
+"""Run instrumentation: per-endpoint request metrics and per-stage wall time.
+
+Kept free of config and third-party imports so the FastAPI service can use
+the same registry and Prometheus rendering.
+"""
+import functools
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+_KEY_SEGMENT = re.compile(r"^(/v\d+/[^/?]+)/[^/?]+")
+
+
+# Collapse per-entity paths and query strings so labels stay bounded:
+# "/v3/Users/abc?x=1" -> "/v3/Users/{key}"
+def endpoint_label(endpoint):
+    path = endpoint.split("?", 1)[0]
+    return _KEY_SEGMENT.sub(r"\1/{key}", path)
+
+
+class Metrics:
+    """Thread-safe counters for one run (or one service process)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._endpoints = {}
+            self._stages = {}
+
+    def _endpoint(self, endpoint):
+        label = endpoint_label(endpoint)
+        stats = self._endpoints.get(label)
+        if stats is None:
+            stats = self._endpoints[label] = {
+                "requests": 0, "statuses": {}, "bytes": 0, "retries": 0,
+                "latency": {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0},
+            }
+        return stats
+
+    def record_request(self, endpoint, status, seconds, nbytes):
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats["requests"] += 1
+            stats["statuses"][str(status)] = stats["statuses"].get(str(status), 0) + 1
+            stats["bytes"] += nbytes
+            latency = stats["latency"]
+            latency["sum"] += seconds
+            latency["count"] += 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    latency["buckets"][i] += 1
+                    break
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self._endpoint(endpoint)["retries"] += 1
+
+    def record_stage(self, name, seconds):
+        with self._lock:
+            stats = self._stages.setdefault(name, {"calls": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - started)
+
+    def timed(self, name):
+        """Decorator form of stage() for fetch_*/process/write functions."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "wall_seconds": time.time() - self.started_at,
+                "latency_buckets": [str(bound) for bound in LATENCY_BUCKETS],
+                "endpoints": json.loads(json.dumps(self._endpoints)),
+                "stages": {name: dict(stats) for name, stats in self._stages.items()},
+            }
+
+    def write_report(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=4)
+
+
+# Process-wide registry used by karbon.http and the fetch/report/writer stages
+registry = Metrics()
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+# Render a snapshot() dict in the Prometheus text exposition format
+def prometheus_text(snapshot, prefix="karbon"):
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{prefix}_{name}{suffix}{labels} {value}")
+
+    endpoints = snapshot["endpoints"]
+    metric("http_requests_total", "counter", "Upstream Karbon requests by endpoint and status.", [
+        ("", _labels(endpoint=label, status=status), count)
+        for label, stats in endpoints.items() for status, count in sorted(stats["statuses"].items())
+    ])
+    metric("http_response_bytes_total", "counter", "Response bytes received from Karbon.", [
+        ("", _labels(endpoint=label), stats["bytes"]) for label, stats in endpoints.items()
+    ])
+    metric("http_retries_total", "counter", "Retried Karbon requests.", [
+        ("", _labels(endpoint=label), stats["retries"]) for label, stats in endpoints.items()
+    ])
+
+    samples = []
+    for label, stats in endpoints.items():
+        latency, cumulative = stats["latency"], 0
+        for bound, count in zip(snapshot["latency_buckets"], latency["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == "inf" else bound
+            samples.append(("_bucket", _labels(endpoint=label, le=le), cumulative))
+        samples.append(("_sum", _labels(endpoint=label), latency["sum"]))
+        samples.append(("_count", _labels(endpoint=label), latency["count"]))
+    metric("http_request_duration_seconds", "histogram", "Karbon request latency.", samples)
+
+    stages = snapshot["stages"]
+    metric("stage_seconds_total", "counter", "Wall time spent per stage.", [
+        ("", _labels(stage=name), stats["seconds"]) for name, stats in stages.items()
+    ])
+    metric("stage_calls_total", "counter", "Completed calls per stage.", [
+        ("", _labels(stage=name), stats["calls"]) for name, stats in stages.items()
+    ])
+    metric("run_wall_seconds", "gauge", "Seconds since the registry was started.", [
+        ("", "", snapshot["wall_seconds"])
+    ])
+    return "\n".join(lines) + "\n"
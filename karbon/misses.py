@@ -0,0 +1,41 @@
+"""Aggregated diagnostics for keys that could not be resolved during a run.
+
+Report building records each miss here instead of logging it; the CLI logs
+one summary with a count per key when the run ends.
+"""
+import threading
+from collections import Counter
+
+from karbon.util import log
+
+_lock = threading.Lock()
+_misses = {}  # {kind: Counter({key: occurrences})}
+
+
+def record(kind, key):
+    with _lock:
+        _misses.setdefault(kind, Counter())[key if key else "(none)"] += 1
+
+
+# Fold in a snapshot() taken elsewhere, e.g. in a worker process
+def merge(counts_by_kind):
+    with _lock:
+        for kind, counts in counts_by_kind.items():
+            _misses.setdefault(kind, Counter()).update(counts)
+
+
+def reset():
+    with _lock:
+        _misses.clear()
+
+
+def snapshot():
+    with _lock:
+        return {kind: dict(counter.most_common()) for kind, counter in _misses.items()}
+
+
+def log_summary():
+    for kind, counts in snapshot().items():
+        log(f"Unresolved {kind}s: {len(counts)} keys across {sum(counts.values())} entries.")
+        for key, count in counts.items():
+            log(f"  {key}: {count}")
@@ -0,0 +1,59 @@
+"""Entity endpoints known to return 404, persisted across runs with a TTL.
+
+Per-key lookups (users, contacts, clients) consult this before going to the
+network so keys that no longer exist in Karbon are not re-requested every run.
+"""
+import json
+import os
+import threading
+import time
+
+from config import NEGATIVE_CACHE_PATH, NEGATIVE_CACHE_TTL_HOURS
+from karbon.util import log
+
+_lock = threading.Lock()
+_entries = None  # {endpoint: expires_at}, loaded on first use
+_dirty = False
+
+
+def _load():
+    global _entries
+    if _entries is not None:
+        return
+    _entries = {}
+    if NEGATIVE_CACHE_PATH and os.path.exists(NEGATIVE_CACHE_PATH):
+        try:
+            with open(NEGATIVE_CACHE_PATH) as f:
+                _entries = json.load(f)
+        except (OSError, ValueError) as e:
+            log(f"Ignoring unreadable negative cache {NEGATIVE_CACHE_PATH}: {e}")
+
+
+def is_missing(endpoint):
+    with _lock:
+        _load()
+        expires_at = _entries.get(endpoint)
+        return expires_at is not None and expires_at > time.time()
+
+
+def mark_missing(endpoint):
+    global _dirty
+    with _lock:
+        _load()
+        _entries[endpoint] = time.time() + NEGATIVE_CACHE_TTL_HOURS * 3600
+        _dirty = True
+
+
+# Write the cache back (dropping expired entries); call once at the end of a run
+def save():
+    global _dirty
+    with _lock:
+        if not _dirty or not NEGATIVE_CACHE_PATH:
+            return
+        now = time.time()
+        live = {endpoint: expires_at for endpoint, expires_at in _entries.items() if expires_at > now}
+        tmp_path = f"{NEGATIVE_CACHE_PATH}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(live, f)
+        os.replace(tmp_path, NEGATIVE_CACHE_PATH)
+        _dirty = False
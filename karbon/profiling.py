@@ -0,0 +1,109 @@
+"""Opt-in CPU and memory profiling of an extract run (``--profile``).
+
+cProfile covers every thread the run starts, so the pooled timesheet pulls,
+``make_http_request`` and its JSON decoding show up next to ``process_data``
+and the writers. Before Python 3.12 each profiler sees only its own thread, so
+a profiler is started per thread and their stats merged; from 3.12 one
+profiler sees them all. Worker processes of ``--processes`` aren't profiled.
+
+tracemalloc records the peak of traced memory over the run. Per-site totals
+come from snapshots taken at stage boundaries (``checkpoint``); the report
+breaks down the largest of them.
+"""
+import cProfile
+import io
+import linecache
+import pstats
+import sys
+import threading
+import tracemalloc
+
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _mb(size):
+    return size / (1024 * 1024)
+
+
+class RunProfiler:
+    def __init__(self, top=40):
+        self.top = top
+        self._lock = threading.Lock()
+        self._profiles = []
+        self._checkpoints = []
+        self._largest = None
+        self._peak = 0
+
+    def _profile_thread(self, *_):
+        # Runs once per new thread, as its first profile event
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 3.12+: the main thread's profiler already covers this thread
+            sys.setprofile(None)
+            return
+        with self._lock:
+            self._profiles.append(profile)
+
+    def start(self):
+        tracemalloc.start()
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        threading.setprofile(self._profile_thread)
+        profile.enable()
+
+    def checkpoint(self, label):
+        """Snapshot allocations now, keeping the snapshot with the most memory held."""
+        if not tracemalloc.is_tracing():
+            return
+        # Keep the snapshot itself out of the profile; it's filtered when the report is written
+        self._profiles[0].disable()
+        current = tracemalloc.get_traced_memory()[0]
+        self._checkpoints.append((label, current))
+        if self._largest is None or current > self._largest[1]:
+            self._largest = (label, current, tracemalloc.take_snapshot())
+        self._profiles[0].enable()
+
+    def stop(self):
+        threading.setprofile(None)
+        if tracemalloc.is_tracing():
+            self.checkpoint("end of run")
+            self._peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        for profile in self._profiles:
+            profile.disable()
+
+    def write_reports(self, prefix):
+        """Write ``<prefix>.profile.txt``, ``<prefix>.memory.txt`` and raw ``<prefix>.prof`` stats."""
+        stream = io.StringIO()
+        stats = pstats.Stats(*self._profiles, stream=stream)
+        stats.dump_stats(f"{prefix}.prof")
+        stream.write(f"Profiled {len(self._profiles)} thread(s); load {prefix}.prof in pstats or snakeviz for more.\n")
+        stream.write("\n=== Hot functions by own time ===\n")
+        stats.sort_stats("tottime").print_stats(self.top)
+        stream.write("\n=== Hot functions by cumulative time ===\n")
+        stats.sort_stats("cumulative").print_stats(self.top)
+        with open(f"{prefix}.profile.txt", "w") as f:
+            f.write(stream.getvalue())
+
+        with open(f"{prefix}.memory.txt", "w") as f:
+            f.write(f"Peak traced memory: {_mb(self._peak):.1f} MB\n\n")
+            f.write("Traced memory held at each checkpoint:\n")
+            for label, current in self._checkpoints:
+                f.write(f"  {_mb(current):10.1f} MB  {label}\n")
+            if self._largest is not None:
+                label, current, snapshot = self._largest
+                f.write(f"\nTop allocation sites at '{label}' ({_mb(current):.1f} MB held):\n")
+                for stat in snapshot.filter_traces(_IGNORED_FRAMES).statistics("lineno")[:self.top]:
+                    frame = stat.traceback[0]
+                    source = linecache.getline(frame.filename, frame.lineno).strip()
+                    f.write(f"  {_mb(stat.size):10.2f} MB {stat.count:>10} blocks  {frame.filename}:{frame.lineno}\n")
+                    if source:
+                        f.write(f"  {'':>35}{source}\n")
+        return f"{prefix}.profile.txt", f"{prefix}.memory.txt"
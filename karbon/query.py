@@ -0,0 +1,121 @@
+"""Embedded SQLite store of enriched entries with an ad hoc query CLI.
+
+Extract runs load their rows with ``--sqlite PATH``; questions are then
+answered from local data without re-crawling the API:
+
+    python -m karbon.query --db entries.sqlite3 --contact "Client 12" --group-by task \\
+        --start-date 2024-07-01 --end-date 2024-09-30
+
+Only the standard library is used so the FastAPI service can share it.
+"""
+import argparse
+import json
+import sqlite3
+
+# Columns usable in filters and group_by; "month" derives from the entry date
+GROUP_COLUMNS = {
+    "contact": "contact",
+    "worker": "worker",
+    "task": "task",
+    "date": "date",
+    "month": "substr(date, 1, 7)",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    contact TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    task TEXT NOT NULL,
+    date TEXT NOT NULL,
+    actual_hours REAL NOT NULL,
+    budgeted_hours REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_contact ON entries (contact, date);
+CREATE INDEX IF NOT EXISTS entries_worker ON entries (worker, date);
+CREATE INDEX IF NOT EXISTS entries_task ON entries (task, date);
+CREATE INDEX IF NOT EXISTS entries_date ON entries (date);
+"""
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# Upsert report rows (from process_data) keyed by their "_key". When the run's date
+# range is given, entries in that range are replaced so deletions carry over too.
+def load_rows(db_path, data, start_date=None, end_date=None):
+    conn = connect(db_path)
+    with conn:
+        if start_date and end_date:
+            conn.execute("DELETE FROM entries WHERE date BETWEEN ? AND ?", (str(start_date), str(end_date)))
+        conn.executemany(
+            "INSERT OR REPLACE INTO entries (key, contact, worker, task, date, actual_hours, budgeted_hours) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (row["_key"], row.get("Contact", row.get("Client")), row["Worker"], row["Task"],
+                 row["_date"], row["Actual Hours"], row["Budgeted Hours"])
+                for row in data
+            ),
+        )
+    conn.close()
+
+
+# Sum hours (and count entries) matching the filters, grouped by the given columns
+def query(db_path, contact=None, worker=None, task=None, start_date=None, end_date=None, group_by=("task",)):
+    for column in group_by:
+        if column not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown group_by column {column!r}; expected one of {', '.join(GROUP_COLUMNS)}")
+
+    where, params = [], []
+    for column, value in (("contact", contact), ("worker", worker), ("task", task)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if start_date:
+        where.append("date >= ?")
+        params.append(str(start_date))
+    if end_date:
+        where.append("date <= ?")
+        params.append(str(end_date))
+
+    select = [f"{GROUP_COLUMNS[column]} AS {column}" for column in group_by]
+    sql = (
+        f"SELECT {', '.join(select + ['SUM(actual_hours) AS actual_hours', 'SUM(budgeted_hours) AS budgeted_hours', 'COUNT(*) AS entries'])} "
+        "FROM entries"
+        + (f" WHERE {' AND '.join(where)}" if where else "")
+        + (f" GROUP BY {', '.join(GROUP_COLUMNS[c] for c in group_by)} ORDER BY {', '.join(GROUP_COLUMNS[c] for c in group_by)}" if group_by else "")
+    )
+
+    conn = connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query enriched Karbon entries loaded with --sqlite.")
+    parser.add_argument("--db", default="entries.sqlite3", help="SQLite database written by an extract run")
+    parser.add_argument("--contact", help="only entries for this contact/client name")
+    parser.add_argument("--worker", help="only entries for this worker")
+    parser.add_argument("--task", help="only entries for this task type")
+    parser.add_argument("--start-date", help="inclusive start date, YYYY-MM-DD")
+    parser.add_argument("--end-date", help="inclusive end date, YYYY-MM-DD")
+    parser.add_argument("--group-by", default="task",
+                        help=f"comma-separated columns from: {', '.join(GROUP_COLUMNS)}; empty for a grand total")
+    args = parser.parse_args(argv)
+
+    group_by = tuple(column for column in args.group_by.split(",") if column)
+    try:
+        rows = query(args.db, args.contact, args.worker, args.task, args.start_date, args.end_date, group_by)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(rows, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Host-wide token bucket shared by every process that calls the Karbon API.
+
+The batch scripts and the FastAPI service draw on the same API key quota. Each
+process opens the same small JSON state file and updates it under an exclusive
+file lock, so together they never exceed ``rate`` requests per second (plus a
+``burst``). Interactive callers may drain the bucket; batch callers leave a
+``reserve`` fraction of the burst for them and stand aside entirely while an
+interactive caller is waiting. A 429 seen by any process pauses all of them.
+
+Stdlib only and free of ``config`` imports, so the service can use it too. On
+platforms without ``fcntl`` the bucket only coordinates threads of one process.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an in-process lock
+    fcntl = None
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "karbon_quota.json")
+
+# How long an interactive waiter keeps batch callers out after it last asked
+_INTERACTIVE_HOLD_SECONDS = 0.5
+
+
+class TokenBucket:
+    def __init__(self, path=DEFAULT_PATH, rate=5.0, burst=20, reserve=0.25):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self._lock = threading.Lock()
+
+    def _update(self, change):
+        # Read-modify-write of the shared state under the file lock
+        with self._lock, open(self.path, "a+", encoding="utf-8") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = time.time()
+                elapsed = max(0.0, now - state.get("updated", now))
+                state["tokens"] = min(self.burst, state.get("tokens", self.burst) + elapsed * self.rate)
+                state["updated"] = now
+                result = change(state, now)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    # Take one token for ``priority``; returns 0 on success, else seconds to wait before retrying
+    def try_acquire(self, priority=BATCH):
+        def take(state, now):
+            blocked_until = state.get("blocked_until", 0)
+            if now < blocked_until:
+                return blocked_until - now
+            if priority == BATCH and now < state.get("interactive_until", 0):
+                return state["interactive_until"] - now
+            floor = self.burst * self.reserve if priority == BATCH else 0
+            if state["tokens"] - 1 >= floor:
+                state["tokens"] -= 1
+                return 0.0
+            wait = (floor + 1 - state["tokens"]) / self.rate
+            if priority == INTERACTIVE:
+                state["interactive_until"] = now + wait + _INTERACTIVE_HOLD_SECONDS
+            return wait
+
+        return self._update(take)
+
+    def acquire(self, priority=BATCH):
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority)
+            if not wait:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, priority=INTERACTIVE):
+        # Only the service waits asynchronously; batch scripts skip loading asyncio
+        import asyncio
+
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority)
+            if not wait:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    # Pause every caller on the host, e.g. for a 429's Retry-After
+    def backoff(self, seconds):
+        def block(state, now):
+            state["blocked_until"] = max(state.get("blocked_until", 0), now + seconds)
+
+        self._update(block)
+
+
+# Bucket for the given settings, or None when rate limiting is disabled (rate <= 0)
+def open_bucket(path=DEFAULT_PATH, rate=5.0, burst=20, reserve=0.25):
+    if rate <= 0:
+        return None
+    return TokenBucket(path or DEFAULT_PATH, rate, burst, reserve)
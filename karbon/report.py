@@ -0,0 +1,279 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import START_DATE, END_DATE
+from karbon import fetch, misses
+from karbon.metrics import registry as metrics
+from karbon.util import log, progress
+
+# Output columns per variant; contacts-based extracts label the client column "Contact".
+# Rows also carry internal "_"-prefixed fields ("_key", "_date") that writers never export.
+FIELDNAMES = {
+    "contacts": ['Contact', 'Worker', 'Task', 'Actual Hours', 'Budgeted Hours'],
+    "work-items": ['Client', 'Worker', 'Task', 'Actual Hours', 'Budgeted Hours'],
+    "per-key": ['Client', 'Worker', 'Task', 'Actual Hours', 'Budgeted Hours'],
+}
+VARIANTS = tuple(FIELDNAMES)
+
+
+def _hours(minutes):
+    return minutes / 60 if minutes is not None else 0
+
+
+def _user_keys(timesheets):
+    return {timesheet["UserKey"] for timesheet in timesheets}
+
+
+def _client_keys(timesheets):
+    client_keys = set()
+    for timesheet in timesheets:
+        for entry in timesheet.get("TimeEntries", []):
+            if entry.get("ClientKey"):
+                client_keys.add(entry["ClientKey"])
+    return client_keys
+
+
+# Fetch the lookup tables a variant needs for the given timesheets.
+# Batch runs call this once over the union of every range's timesheets.
+@metrics.timed("load_reference")
+def load_reference(variant, timesheets, contact_type=None):
+    if variant == "contacts":
+        return {
+            "contacts": fetch.fetch_contacts(contact_type),
+            "users": fetch.fetch_users(_user_keys(timesheets)),
+        }
+    if variant == "work-items":
+        budgets = {}
+        for work_item in fetch.fetch_work_items():
+            budgets.setdefault(work_item.get("WorkKey"), (work_item.get("BudgetedMinutes") or 0) / 60)
+        return {
+            "budgets": budgets,
+            "users": {key: fetch.get_user_name(key) for key in _user_keys(timesheets)},
+            "clients": {key: fetch.get_client_name(key) for key in _client_keys(timesheets)},
+        }
+    if variant == "per-key":
+        return {
+            "users": fetch.fetch_all_users(),
+            "clients": fetch.fetch_contacts_by_keys(_client_keys(timesheets)),
+        }
+    raise ValueError(f"Unknown variant {variant!r}; expected one of {', '.join(VARIANTS)}")
+
+
+# Contacts variant: resolve ClientKeys against a full (optionally filtered) contact listing
+def _contact_row(entry, user_name, reference, contact_type):
+    client_key = entry.get("ClientKey")
+    contact_name = reference["contacts"].get(client_key) if client_key else None
+    if contact_name is None:
+        misses.record("ClientKey", client_key)
+        contact_name = "Unknown Contact"
+
+    return {
+        "Contact": contact_name,
+        "Worker": user_name,
+        "Task": entry.get("TaskTypeName", "Unknown Task"),
+        "Actual Hours": _hours(entry.get("Minutes")),
+        "Budgeted Hours": 0  # Budgeted hours omitted until the Work API is functional
+    }
+
+
+# Work-items and per-key variants: client names resolved per ClientKey
+def _client_row(entry, user_name, reference, contact_type):
+    client_name = reference["clients"].get(entry.get("ClientKey"), "Unknown Client")
+    if client_name == "Unknown Client":
+        misses.record("ClientKey", entry.get("ClientKey"))
+
+    return {
+        "Client": client_name,
+        "Worker": user_name,
+        "Task": entry.get("TaskTypeName", "Unknown Task"),
+        "Actual Hours": _hours(entry.get("Minutes")),
+        "Budgeted Hours": reference.get("budgets", {}).get(entry.get("EntityKey"), 0)
+    }
+
+
+# Stable identity of a time entry: TimesheetKey plus TimeEntryKey, falling back
+# to the entry's position when Karbon does not return a key
+def entry_key(timesheet, entry, index):
+    return f"{timesheet.get('TimesheetKey')}:{entry.get('TimeEntryKey') or index}"
+
+
+# Date a time entry is booked on (YYYY-MM-DD), falling back to its timesheet's start
+def entry_date(timesheet, entry):
+    return (entry.get("Date") or timesheet.get("StartDate") or "")[:10]
+
+
+# Yield (key, date, entry) for each distinct time entry dated within the range, in
+# one pass: a set of seen keys drops entries repeated across timesheets or pages
+def index_entries(timesheet, seen, start_date=None, end_date=None):
+    for index, entry in enumerate(timesheet.get("TimeEntries", [])):
+        key = entry_key(timesheet, entry, index)
+        date = entry_date(timesheet, entry)
+        if key in seen or (start_date and date < str(start_date)) or (end_date and date > str(end_date)):
+            continue
+        seen.add(key)
+        yield key, date, entry
+
+
+# Report rows for one timesheet's distinct, in-range entries
+def _timesheet_rows(variant, timesheet, reference, contact_type, seen, start_date, end_date):
+    entries = list(index_entries(timesheet, seen, start_date, end_date))
+    if not entries:
+        return []
+    make_row = _contact_row if variant == "contacts" else _client_row
+    user_name = reference["users"].get(timesheet["UserKey"], "Unknown Worker")
+    if user_name in ("Unknown Worker", "Unknown User"):
+        misses.record("UserKey", timesheet["UserKey"])
+
+    rows = []
+    for key, date, entry in entries:
+        row = make_row(entry, user_name, reference, contact_type)
+        row["_key"] = key
+        row["_date"] = date
+        rows.append(row)
+    return rows
+
+
+def _log_skipped(timesheets, rows, start_date, end_date):
+    total = sum(len(timesheet.get("TimeEntries", [])) for timesheet in timesheets)
+    if total > len(rows):
+        log(f"Skipped {total - len(rows)} time entries outside {start_date} to {end_date} or already seen.")
+
+
+# Turn timesheets into report rows using already-loaded reference data. With a
+# range, entries are clipped to it by their own date; duplicates are always dropped.
+# processes > 1 enriches shards of the timesheets in a process pool instead.
+@metrics.timed("build_rows")
+def build_rows(variant, timesheets, reference, contact_type=None, start_date=None, end_date=None,
+               processes=0, shard_by="user"):
+    if processes > 1:
+        return _build_rows_sharded(variant, timesheets, reference, contact_type, start_date, end_date,
+                                   processes, shard_by)
+
+    result, seen = [], set()
+    with progress(total=len(timesheets), desc="Processing timesheets") as pbar:
+        for timesheet in timesheets:
+            result.extend(_timesheet_rows(variant, timesheet, reference, contact_type, seen, start_date, end_date))
+            pbar.update(1)
+
+    _log_skipped(timesheets, result, start_date, end_date)
+    return result
+
+
+# Timesheets of one user, or starting in one month, always land in the same shard,
+# so a repeated timesheet is still de-duplicated within its shard
+SHARD_KEYS = ("user", "month")
+
+
+def _shard_key(timesheet, shard_by):
+    if shard_by == "month":
+        return (timesheet.get("StartDate") or "")[:7]
+    return timesheet.get("UserKey") or ""
+
+
+# Timesheets, reference data and settings each pool worker receives once, when it
+# starts (inherited without copying where processes fork)
+_shard_context = None
+
+
+def _init_shard_worker(variant, timesheets, reference, contact_type, start_date, end_date):
+    global _shard_context
+    _shard_context = (variant, timesheets, reference, contact_type, start_date, end_date)
+
+
+# Enrich the timesheets at the given positions in a worker process. Rows travel
+# back as value tuples, which pickle far smaller than dicts; the worker's
+# unresolved keys come back too for the parent to merge.
+def _build_shard(positions):
+    variant, timesheets, reference, contact_type, start_date, end_date = _shard_context
+    misses.reset()
+    seen = set()
+    rows = []
+    for position in positions:
+        timesheet_rows = _timesheet_rows(variant, timesheets[position], reference, contact_type,
+                                         seen, start_date, end_date)
+        rows.append((position, [tuple(row.values()) for row in timesheet_rows]))
+    return rows, misses.snapshot()
+
+
+def _build_rows_sharded(variant, timesheets, reference, contact_type, start_date, end_date, processes, shard_by):
+    # multiprocessing is only loaded for runs that opt in with --processes
+    from concurrent.futures import ProcessPoolExecutor
+
+    shards = {}
+    for position, timesheet in enumerate(timesheets):
+        shards.setdefault(_shard_key(timesheet, shard_by), []).append(position)
+
+    # Rows are merged back in timesheet order, so the output matches a sequential run
+    columns = FIELDNAMES[variant] + ["_key", "_date"]
+    by_position = [None] * len(timesheets)
+    initargs = (variant, timesheets, reference, contact_type, start_date, end_date)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_shard_worker, initargs=initargs) as pool, \
+            progress(total=len(shards), desc=f"Enriching {len(shards)} shards by {shard_by}") as pbar:
+        for rows, shard_misses in pool.map(_build_shard, shards.values()):
+            for position, values in rows:
+                by_position[position] = values
+            misses.merge(shard_misses)
+            pbar.update(1)
+
+    result = [dict(zip(columns, values)) for timesheet_rows in by_position for values in timesheet_rows]
+    _log_skipped(timesheets, result, start_date, end_date)
+    return result
+
+
+# Contacts variant fetch phase: the contact crawl runs alongside the timesheet
+# pulls, and each user is looked up as soon as a timesheet page mentions it.
+# At most max_workers ranges are pulled at once; the contact crawl, submitted
+# first, always has its own extra thread.
+def _fetch_overlapped(ranges, contact_type, max_workers):
+    users, lock = {}, threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(ranges), max_workers)) + 1) as crawls, \
+            ThreadPoolExecutor(max_workers=max_workers) as lookups:
+
+        def on_page(timesheets):
+            with lock:
+                for user_key in _user_keys(timesheets) - users.keys():
+                    users[user_key] = lookups.submit(fetch.fetch_user_name, user_key)
+
+        contacts = crawls.submit(fetch.fetch_contacts, contact_type)
+        pulls = {
+            date_range: crawls.submit(fetch.fetch_timesheets, *date_range, on_page=on_page)
+            for date_range in ranges
+        }
+        timesheets_by_range = {date_range: future.result() for date_range, future in pulls.items()}
+        reference = {
+            "contacts": contacts.result(),
+            "users": {user_key: future.result() for user_key, future in users.items()},
+        }
+
+    log(f"Resolved {len(reference['users'])} users while fetching timesheets.")
+    return timesheets_by_range, reference
+
+
+# Process and structure the data for the selected variant
+def process_data(variant="contacts", start_date=START_DATE, end_date=END_DATE, contact_type=None):
+    return process_ranges(variant, [(start_date, end_date)], contact_type)[(start_date, end_date)]
+
+
+# Process several date ranges in one run: timesheet pulls run concurrently,
+# reference data is fetched once and shared. processes > 1 enriches each range's
+# timesheets in a process pool, sharded by user or month. Returns {(start, end): rows}.
+@metrics.timed("process_data")
+def process_ranges(variant, ranges, contact_type=None, max_workers=4, processes=0, shard_by="user"):
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown variant {variant!r}; expected one of {', '.join(VARIANTS)}")
+
+    if variant == "contacts":
+        timesheets_by_range, reference = _fetch_overlapped(ranges, contact_type, max_workers)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pulls = {date_range: executor.submit(fetch.fetch_timesheets, *date_range) for date_range in ranges}
+            timesheets_by_range = {date_range: future.result() for date_range, future in pulls.items()}
+        all_timesheets = [timesheet for timesheets in timesheets_by_range.values() for timesheet in timesheets]
+        reference = load_reference(variant, all_timesheets, contact_type) if all_timesheets else None
+
+    return {
+        date_range: build_rows(variant, timesheets, reference, contact_type, *date_range,
+                               processes=processes, shard_by=shard_by) if timesheets else []
+        for date_range, timesheets in timesheets_by_range.items()
+    }
@@ -0,0 +1,303 @@
+"""Binary snapshot of enriched entries that reloads without a JSON parse.
+
+Extract runs write it with ``--snapshot PATH``. The file holds one fixed-width
+little-endian column per field plus a shared string table, so readers mmap it
+and touch only the columns they use:
+
+    with Snapshot("entries.ksnap") as snap:
+        hours = snap.column("actual_hours")     # zero-copy memoryview of float64
+        workers = snap.values("worker")         # decodes each distinct name once
+
+Layout: ``MAGIC``, a uint32 metadata length and the JSON metadata (row count,
+fieldnames, column and string table offsets), then the 8-byte aligned data:
+string columns as uint32 ids into the table (``NULL_ID`` for None), the entry
+date as uint32 YYYYMMDD, hours as float64, and the string table as uint64
+offsets followed by the UTF-8 bytes.
+
+/api/query in old/main.py reads snapshots through ``query`` when
+ENTRIES_SNAPSHOT_PATH is set.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from karbon.metrics import registry as metrics
+from karbon.query import GROUP_COLUMNS
+
+MAGIC = b"KSNAP001"
+NULL_ID = 0xFFFFFFFF
+
+# Snapshot column -> (array typecode, row field); "contact" reads Contact or Client
+STRING_COLUMNS = ("contact", "worker", "task", "key")
+NUMERIC_COLUMNS = {
+    "date": ("I", "_date"),
+    "actual_hours": ("d", "Actual Hours"),
+    "budgeted_hours": ("d", "Budgeted Hours"),
+}
+_STRING_FIELDS = {"worker": "Worker", "task": "Task", "key": "_key"}
+_HEADER = struct.Struct("<8sI")
+_ALIGN = 8
+
+
+def _pad(length):
+    return -length % _ALIGN
+
+
+def _date_int(value):
+    return int(value[:10].replace("-", "")) if value else 0
+
+
+def _date_str(value):
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}" if value else None
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+@metrics.timed("write_snapshot")
+def write_snapshot(path, data, fieldnames):
+    """Write report rows (from process_data) to ``path``, replacing it atomically."""
+    label = fieldnames[0]
+    ids, strings = {}, []
+
+    def intern(value):
+        if value is None:
+            return NULL_ID
+        string_id = ids.get(value)
+        if string_id is None:
+            string_id = ids[value] = len(strings)
+            strings.append(value.encode("utf-8"))
+        return string_id
+
+    columns = {name: array("I") for name in STRING_COLUMNS}
+    columns.update((name, array(typecode)) for name, (typecode, _) in NUMERIC_COLUMNS.items())
+    for row in data:
+        columns["contact"].append(intern(row.get(label)))
+        for name, field in _STRING_FIELDS.items():
+            columns[name].append(intern(row.get(field)))
+        columns["date"].append(_date_int(row.get("_date")))
+        columns["actual_hours"].append(row.get("Actual Hours") or 0.0)
+        columns["budgeted_hours"].append(row.get("Budgeted Hours") or 0.0)
+
+    offsets = array("Q", [0])
+    for encoded in strings:
+        offsets.append(offsets[-1] + len(encoded))
+    sections = [(name, values.typecode, _little_endian(values)) for name, values in columns.items()]
+    sections.append(("strings.offsets", "Q", _little_endian(offsets)))
+    sections.append(("strings.data", "B", b"".join(strings)))
+
+    # Offsets are relative to the aligned start of the data, so they don't depend on the metadata size
+    layout, position = {}, 0
+    for name, typecode, payload in sections:
+        layout[name] = {"type": typecode, "offset": position, "length": len(payload)}
+        position += len(payload) + _pad(len(payload))
+    metadata = json.dumps({
+        "rows": len(columns["key"]),
+        "fieldnames": list(fieldnames),
+        "strings": len(strings),
+        "columns": layout,
+    }, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(metadata)))
+        f.write(metadata)
+        f.write(b"\0" * _pad(_HEADER.size + len(metadata)))
+        for _, _, payload in sections:
+            f.write(payload)
+            f.write(b"\0" * _pad(len(payload)))
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Memory-mapped, read-only view of a snapshot file.
+
+    Columns are sliced straight out of the mapping; strings are decoded on first
+    use and cached by id. Views returned by ``column`` must be dropped before
+    ``close``, as an mmap can't be closed while it's exported.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"'{path}' is not an entries snapshot")
+        meta_end = _HEADER.size + meta_length
+        metadata = json.loads(self._mmap[_HEADER.size:meta_end])
+        self.fieldnames = metadata["fieldnames"]
+        self._rows = metadata["rows"]
+        self._layout = metadata["columns"]
+        self._data = memoryview(self._mmap)[meta_end + _pad(meta_end):]
+        self._offsets = self._section("strings.offsets")
+        self._strings = {}
+
+    def __len__(self):
+        return self._rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._offsets.release()
+        self._data.release()
+        self._mmap.close()
+
+    def _section(self, name):
+        spec = self._layout[name]
+        raw = self._data[spec["offset"]:spec["offset"] + spec["length"]]
+        if spec["type"] == "B":
+            return raw
+        if sys.byteorder == "big":
+            values = array(spec["type"], raw)
+            values.byteswap()
+            return memoryview(values)
+        return raw.cast(spec["type"])
+
+    def column(self, name):
+        """Raw column: float64 hours, uint32 YYYYMMDD dates, or uint32 string ids."""
+        if name not in NUMERIC_COLUMNS and name not in STRING_COLUMNS:
+            raise ValueError(f"Unknown snapshot column {name!r}")
+        return self._section(name)
+
+    def string(self, string_id):
+        if string_id == NULL_ID:
+            return None
+        value = self._strings.get(string_id)
+        if value is None:
+            start, end = self._offsets[string_id], self._offsets[string_id + 1]
+            data = self._layout["strings.data"]["offset"]
+            value = self._strings[string_id] = str(self._data[data + start:data + end], "utf-8")
+        return value
+
+    def values(self, name):
+        """Decoded values of one column, e.g. names for string columns and ISO strings for dates."""
+        if name in STRING_COLUMNS:
+            return [self.string(string_id) for string_id in self.column(name)]
+        if name == "date":
+            return [_date_str(value) for value in self.column(name)]
+        return self.column(name).tolist()
+
+    def string_id(self, value):
+        """Id of ``value`` in the string table, or None when no row uses it."""
+        encoded = value.encode("utf-8")
+        data = self._layout["strings.data"]["offset"]
+        for string_id in range(len(self._offsets) - 1):
+            start, end = self._offsets[string_id], self._offsets[string_id + 1]
+            if end - start == len(encoded) and self._data[data + start:data + end] == encoded:
+                return string_id
+        return None
+
+    def rows(self):
+        """Report rows as process_data returned them, for writers and delta exports."""
+        label, worker, task, actual, budgeted = self.fieldnames
+        return [
+            {label: contact, worker: worker_name, task: task_name, actual: actual_hours,
+             budgeted: budgeted_hours, "_key": key, "_date": entry_date}
+            for contact, worker_name, task_name, actual_hours, budgeted_hours, key, entry_date in zip(
+                self.values("contact"), self.values("worker"), self.values("task"),
+                self.values("actual_hours"), self.values("budgeted_hours"),
+                self.values("key"), self.values("date"),
+            )
+        ]
+
+
+def _group_value(column, snap, index):
+    if column == "date":
+        return _date_str(snap.column("date")[index])
+    if column == "month":
+        return _date_str(snap.column("date")[index])[:7]
+    return snap.string(snap.column(column)[index])
+
+
+# Column views are local here so they are released before the snapshot closes
+def _totals(snap, contact, worker, task, start_date, end_date, group_by):
+    # Filters compare string ids, so each filter value is looked up once
+    filters = []
+    for column, value in (("contact", contact), ("worker", worker), ("task", task)):
+        if value is not None:
+            string_id = snap.string_id(value)
+            if string_id is None:
+                return []
+            filters.append((snap.column(column), string_id))
+    dates = snap.column("date") if start_date or end_date or {"date", "month"} & set(group_by) else None
+    low = _date_int(str(start_date)) if start_date else 0
+    high = _date_int(str(end_date)) if end_date else NULL_ID
+
+    # Group on raw ids and date ints; decode only the distinct groups at the end
+    keys = [snap.column("date") if column in ("date", "month") else snap.column(column) for column in group_by]
+    months = [column == "month" for column in group_by]
+    actual, budgeted = snap.column("actual_hours"), snap.column("budgeted_hours")
+    totals = {}
+    for index in range(len(snap)):
+        if dates is not None and not low <= dates[index] <= high:
+            continue
+        if any(ids[index] != string_id for ids, string_id in filters):
+            continue
+        group = tuple(values[index] // 100 if month else values[index] for values, month in zip(keys, months))
+        total = totals.get(group)
+        if total is None:
+            total = totals[group] = [0.0, 0.0, 0, index]
+        total[0] += actual[index]
+        total[1] += budgeted[index]
+        total[2] += 1
+
+    result = []
+    for actual_hours, budgeted_hours, entries, first in totals.values():
+        row = {column: _group_value(column, snap, first) for column in group_by}
+        row.update(actual_hours=actual_hours, budgeted_hours=budgeted_hours, entries=entries)
+        result.append(row)
+    return result
+
+
+def query(path, contact=None, worker=None, task=None, start_date=None, end_date=None, group_by=("task",)):
+    """Same results as karbon.query.query, read from a snapshot's columns instead of SQLite."""
+    for column in group_by:
+        if column not in GROUP_COLUMNS:
+            raise ValueError(f"Unknown group_by column {column!r}; expected one of {', '.join(GROUP_COLUMNS)}")
+
+    with Snapshot(path) as snap:
+        result = _totals(snap, contact, worker, task, start_date, end_date, group_by)
+    if not group_by and not result:
+        # Like SQL aggregates over no rows
+        result = [{"actual_hours": None, "budgeted_hours": None, "entries": 0}]
+    if group_by:
+        result.sort(key=lambda row: tuple((row[column] is not None, row[column] or "") for column in group_by))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query enriched Karbon entries saved with --snapshot.")
+    parser.add_argument("snapshot", help="snapshot file written by an extract run")
+    parser.add_argument("--contact", help="only entries for this contact/client name")
+    parser.add_argument("--worker", help="only entries for this worker")
+    parser.add_argument("--task", help="only entries for this task type")
+    parser.add_argument("--start-date", help="inclusive start date, YYYY-MM-DD")
+    parser.add_argument("--end-date", help="inclusive end date, YYYY-MM-DD")
+    parser.add_argument("--group-by", default="task",
+                        help=f"comma-separated columns from: {', '.join(GROUP_COLUMNS)}; empty for a grand total")
+    args = parser.parse_args(argv)
+
+    group_by = tuple(column for column in args.group_by.split(",") if column)
+    try:
+        rows = query(args.snapshot, args.contact, args.worker, args.task, args.start_date, args.end_date, group_by)
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(rows, indent=4))
+
+
+if __name__ == "__main__":
+    main()
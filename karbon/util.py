@@ -0,0 +1,37 @@
+from config import VERBOSE_LOGGING
+
+
+def log(message):
+    """Logs messages based on the verbose logging flag."""
+    if VERBOSE_LOGGING:
+        print(message)
+
+
+# Minimal stand-in used when tqdm is not installed
+class _NullProgress:
+    def __init__(self, iterable=None, total=None, desc=None, **kwargs):
+        self.iterable = iterable
+
+    def __iter__(self):
+        return iter(self.iterable if self.iterable is not None else ())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, n=1):
+        pass
+
+    def close(self):
+        pass
+
+
+def progress(iterable=None, total=None, desc=None):
+    """Returns a tqdm progress bar, importing tqdm only on first use."""
+    try:
+        from tqdm import tqdm
+    except ImportError:
+        return _NullProgress(iterable, total=total, desc=desc)
+    return tqdm(iterable, total=total, desc=desc)
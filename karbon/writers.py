@@ -0,0 +1,41 @@
+import csv
+import json
+import os
+
+from karbon.metrics import registry as metrics
+from karbon.util import log
+
+
+# Write through a temporary file next to the target, then rename over it,
+# so readers never see a half-written export
+def _atomic_open(path, newline=None):
+    tmp_path = f"{path}.tmp"
+    return open(tmp_path, 'w', newline=newline), tmp_path
+
+
+def _project(data, fieldnames):
+    return [{name: row[name] for name in fieldnames} for row in data]
+
+
+# Write data to CSV
+@metrics.timed("write_to_csv")
+def write_to_csv(data, fieldnames, path='output_data.csv'):
+    log("Writing data to CSV file...")
+    csvfile, tmp_path = _atomic_open(path, newline='')
+    with csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(data)
+    os.replace(tmp_path, path)
+    log("CSV file written successfully.")
+
+
+# Write data to JSON; with fieldnames, only those columns are exported
+@metrics.timed("write_to_json")
+def write_to_json(data, path='output_data.json', fieldnames=None):
+    log("Writing data to JSON file...")
+    jsonfile, tmp_path = _atomic_open(path)
+    with jsonfile:
+        json.dump(_project(data, fieldnames) if fieldnames else data, jsonfile, indent=4)
+    os.replace(tmp_path, path)
+    log("JSON file written successfully.")
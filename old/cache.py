@@ -0,0 +1,118 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class MemoryCache:
+    """Per-process cache with the same interface as SQLiteCache.
+
+    Used when no cache path is configured, and as a stand-in for SQLiteCache in tests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._leases = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            # Case-insensitive like SQLite's LIKE, since Karbon paths are too
+            keys = [key for key in self._entries if key.lower().startswith(prefix.lower())]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def acquire(self, key: str, seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._leases.get(key, 0) > now:
+                return False
+            self._leases[key] = now + seconds
+            return True
+
+    def release(self, key: str):
+        with self._lock:
+            self._leases.pop(key, None)
+
+
+class SQLiteCache:
+    """Host-wide cache shared by every process that opens the same SQLite file.
+
+    Values are stored as JSON with an expiry time. ``acquire``/``release`` hand out a
+    short lease per key so that, on a miss, one process fetches while the others wait
+    for its result instead of calling upstream themselves. SQLite's file locking
+    serializes writers; WAL mode keeps readers from blocking on them.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl),
+            )
+
+    def delete_prefix(self, prefix: str) -> int:
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self._lock:
+            return self._conn.execute("DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (pattern,)).rowcount
+
+    def acquire(self, key: str, seconds: float) -> bool:
+        """Take the fetch lease for ``key``; False while another holder's lease is live."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+                acquired = self._conn.execute(
+                    "INSERT OR IGNORE INTO leases (key, expires_at) VALUES (?, ?)", (key, now + seconds)
+                ).rowcount == 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return acquired
+
+    def release(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ?", (key,))
+
+
+def open_cache(path: Optional[str]):
+    """SQLiteCache at ``path``, or a per-process MemoryCache when no path is set."""
+    return SQLiteCache(path) if path else MemoryCache()
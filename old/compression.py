@@ -0,0 +1,89 @@
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip covers every client that asks for compression
+    brotli = None
+
+
+def _accepted(accept_encoding: str) -> set:
+    """Encodings named in an Accept-Encoding header, minus those refused with ``q=0``."""
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = params.strip()
+        try:
+            refused = quality.startswith("q=") and float(quality[2:]) == 0
+        except ValueError:
+            refused = False
+        if name.strip() and not refused:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class CompressionMiddleware:
+    """Compress response bodies of at least ``minimum_size`` bytes with brotli or gzip.
+
+    Brotli is preferred when the client accepts it and the ``brotli`` package is
+    installed. Bodies are buffered before compressing, which suits this app's
+    JSON responses; already-encoded and bodiless responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, scope) -> Optional[str]:
+        headers = dict(scope.get("headers") or [])
+        accepted = _accepted(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        encoding = self._encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def buffered_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = start.get("headers", [])
+            already_encoded = any(name.lower() == b"content-encoding" for name, _ in headers)
+            if len(body) >= self.minimum_size and not already_encoded:
+                body = self._compress(encoding, body)
+                headers = [(name, value) for name, value in headers if name.lower() != b"content-length"]
+                headers += [
+                    (b"content-encoding", encoding.encode("latin-1")),
+                    (b"vary", b"Accept-Encoding"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ]
+                start = {**start, "headers": headers}
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffered_send)
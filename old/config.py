@@ -9,4 +9,35 @@ KARBON_BEARER_TOKEN = os.getenv("KARBON_BEARER_TOKEN")
 KARBON_ACCESS_KEY = os.getenv("KARBON_ACCESS_KEY")
 
 # Karbon API base URL
-KARBON_API_BASE_URL = "https://api.karbonhq.com"
+KARBON_API_BASE_URL = os.getenv("KARBON_API_BASE_URL", "https://api.karbonhq.com")
+
+# Background refresh of materialized reports (0 disables the scheduler)
+REFRESH_INTERVAL_SECONDS = float(os.getenv("REFRESH_INTERVAL_SECONDS", "900"))
+REFRESH_WINDOW_DAYS = int(os.getenv("REFRESH_WINDOW_DAYS", "90"))
+REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", "reports.sqlite3")
+
+# JSON run report written by the batch scripts' --metrics-report, re-exported on /metrics
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH")
+
+# SQLite database of enriched entries loaded by the batch scripts' --sqlite, queried by /api/query
+ENTRIES_DB_PATH = os.getenv("ENTRIES_DB_PATH", "entries.sqlite3")
+
+# Binary snapshot written by the batch scripts' --snapshot; /api/query reads it instead of the database when set
+ENTRIES_SNAPSHOT_PATH = os.getenv("ENTRIES_SNAPSHOT_PATH")
+
+# Responses of at least this many bytes are gzip/brotli-compressed for clients that accept it
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Karbon responses cached in a SQLite file shared by all uvicorn workers on the host
+# (empty path keeps a per-process cache; a TTL of 0 disables caching)
+KARBON_CACHE_PATH = os.getenv("KARBON_CACHE_PATH", "karbon_cache.sqlite3")
+KARBON_CACHE_TTL_SECONDS = float(os.getenv("KARBON_CACHE_TTL_SECONDS", "300"))
+
+# Host-wide Karbon request budget shared with the batch scripts (rate 0 disables it);
+# service requests take priority over the scripts' batch extraction
+KARBON_QUOTA_PATH = os.getenv("KARBON_QUOTA_PATH", "")
+KARBON_QUOTA_RATE = float(os.getenv("KARBON_QUOTA_RATE", "10"))  # requests per second
+KARBON_QUOTA_BURST = int(os.getenv("KARBON_QUOTA_BURST", "20"))
+
+# Shared secret Karbon webhook subscriptions must send (?token= or X-Webhook-Token); unset disables the receiver
+KARBON_WEBHOOK_SECRET = os.getenv("KARBON_WEBHOOK_SECRET")
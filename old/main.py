@@ -1,11 +1,44 @@
-from fastapi import FastAPI, HTTPException, Depends, Query, Security, Header
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends, Query, Security, Header, Request, Response
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, APIKeyHeader
-from typing import List, Optional
-from datetime import date
+from typing import List, Optional, Union
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from datetime import date, datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlencode, urlsplit
+import asyncio
+import base64
+import hashlib
+import hmac
 import httpx
+import json
 import logging
-from pydantic import BaseModel
-from config import KARBON_BEARER_TOKEN, KARBON_ACCESS_KEY, KARBON_API_BASE_URL
+import os
+import sys
+import time
+from pydantic import BaseModel, TypeAdapter
+from config import (
+    KARBON_BEARER_TOKEN, KARBON_ACCESS_KEY, KARBON_API_BASE_URL,
+    REFRESH_INTERVAL_SECONDS, REFRESH_WINDOW_DAYS, REPORT_STORE_PATH, RUN_REPORT_PATH, ENTRIES_DB_PATH,
+    ENTRIES_SNAPSHOT_PATH, COMPRESSION_MIN_BYTES, KARBON_CACHE_PATH, KARBON_CACHE_TTL_SECONDS,
+    KARBON_QUOTA_PATH, KARBON_QUOTA_RATE, KARBON_QUOTA_BURST, KARBON_WEBHOOK_SECRET,
+)
+from cache import open_cache
+from compression import CompressionMiddleware
+from refresh import RefreshScheduler
+from store import ReportStore
+
+try:
+    import orjson  # noqa: F401  optional; enables the faster JSON response class
+    DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    DEFAULT_RESPONSE_CLASS = JSONResponse
+
+# The shared karbon package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from karbon.metrics import registry as metrics, prometheus_text
+from karbon import query as entries_query, quota, snapshot as entries_snapshot
 
 # Configure logging
 logging.basicConfig(
@@ -17,13 +50,32 @@ logger = logging.getLogger(__name__)
 print(f"KARBON_BEARER_TOKEN: {KARBON_BEARER_TOKEN}")
 print(f"KARBON_ACCESS_KEY: {KARBON_ACCESS_KEY}")
 
-app = FastAPI()
+report_store = ReportStore(REPORT_STORE_PATH)
+
+# Karbon responses shared by every worker process on the host (None disables caching)
+karbon_cache = open_cache(KARBON_CACHE_PATH) if KARBON_CACHE_TTL_SECONDS > 0 else None
+CACHE_LEASE_SECONDS = 30
+CACHE_POLL_SECONDS = 0.05
+
+# Host-wide Karbon request budget shared with the batch scripts
+karbon_quota = quota.open_bucket(KARBON_QUOTA_PATH, KARBON_QUOTA_RATE, KARBON_QUOTA_BURST)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    refresh_scheduler.start()
+    yield
+    await refresh_scheduler.stop()
+
+app = FastAPI(lifespan=lifespan, default_response_class=DEFAULT_RESPONSE_CLASS)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
 
 security = HTTPBearer()
 api_key_header = APIKeyHeader(name="AccessKey", auto_error=False)
 
 DEBUG_MODE = False  # Set to False to enable authentication checks
 
+MAX_PAGE_SIZE = 500
+
 class BillingItem(BaseModel):
     id: str
     amount: float
@@ -36,6 +88,7 @@ class WorkItem(BaseModel):
     status: str
     budgeted_hours: float
     actual_hours: float
+    client_id: Optional[str] = None
 
 class TimeEntry(BaseModel):
     id: str
@@ -44,12 +97,41 @@ class TimeEntry(BaseModel):
     date: date
     user: str
 
+class Contact(BaseModel):
+    id: str
+    name: str
+
 class BudgetToActualReport(BaseModel):
     work_item: WorkItem
     time_entries: List[TimeEntry]
     total_actual_hours: float
     budget_variance: float
 
+class BudgetToActualSection(BaseModel):
+    key: str
+    total_actual_hours: float
+    reports: List[BudgetToActualReport]
+
+class TimesheetAggregate(BaseModel):
+    user: Optional[str] = None
+    work_item_id: Optional[str] = None
+    period: Optional[date] = None
+    sum_hours: Optional[float] = None
+    count: Optional[int] = None
+    avg_hours: Optional[float] = None
+
+class RollupRow(BaseModel):
+    key: str
+    total_hours: float
+    entry_count: int
+
+class RollupReport(BaseModel):
+    start_date: date
+    end_date: date
+    total_hours: float
+    by_user: List[RollupRow]
+    by_work_item: List[RollupRow]
+
 def get_mock_billing_data():
     return [
         BillingItem(id="1", amount=100.0, date=date(2023, 1, 15), description="Invoice 1"),
@@ -58,8 +140,8 @@ def get_mock_billing_data():
 
 def get_mock_work_items():
     return [
-        WorkItem(id="1", name="Project A", status="in_progress", budgeted_hours=100.0, actual_hours=80.0),
-        WorkItem(id="2", name="Project B", status="completed", budgeted_hours=50.0, actual_hours=55.0),
+        WorkItem(id="1", name="Project A", status="in_progress", budgeted_hours=100.0, actual_hours=80.0, client_id="1"),
+        WorkItem(id="2", name="Project B", status="completed", budgeted_hours=50.0, actual_hours=55.0, client_id="2"),
     ]
 
 def get_mock_time_entries():
@@ -69,18 +151,65 @@ def get_mock_time_entries():
         TimeEntry(id="3", work_item_id="2", hours=6.0, date=date(2023, 2, 1), user="John Doe"),
     ]
 
-async def get_karbon_data(endpoint: str, params: dict = None, headers: dict = None):
+def get_mock_contacts():
+    return [
+        Contact(id="1", name="Acme Corp"),
+        Contact(id="2", name="Globex"),
+    ]
+
+class KarbonUnavailable(Exception):
+    """Karbon returned no usable data for a strict fetch (error status, network failure or non-OData body)."""
+
+async def get_karbon_data(endpoint: str, params: dict = None, headers: dict = None,
+                          priority: str = quota.INTERACTIVE, strict: bool = False):
     if DEBUG_MODE:
         logger.info(f"Debug mode: Returning mock data for endpoint {endpoint}")
         if endpoint == "/v3/billing":
             return get_mock_billing_data()
-        elif endpoint == "/v3/work":
+        elif endpoint in ("/v3/work", "/v3/WorkItems"):
             return get_mock_work_items()
         elif endpoint == "/v3/timesheets":
             return get_mock_time_entries()
+        elif endpoint == "/v3/Contacts":
+            return get_mock_contacts()
         else:
             raise HTTPException(status_code=404, detail="Endpoint not found")
 
+    if karbon_cache is None:
+        return await _fetch_karbon_data(endpoint, params, headers, priority, strict=strict)
+
+    # On a miss one process per host takes the lease and fetches; the others wait for its result
+    key = _cache_key(endpoint, params)
+    deadline = time.monotonic() + CACHE_LEASE_SECONDS
+    while True:
+        cached = karbon_cache.get(key)
+        if cached is not None:
+            return cached
+        if karbon_cache.acquire(key, CACHE_LEASE_SECONDS):
+            break
+        if time.monotonic() >= deadline:
+            # The lease holder is stuck or gone; fetch without it rather than wait again
+            return await _fetch_karbon_data(endpoint, params, headers, priority, cache_key=key, strict=strict)
+        await asyncio.sleep(CACHE_POLL_SECONDS)
+    try:
+        cached = karbon_cache.get(key)
+        if cached is not None:
+            return cached
+        return await _fetch_karbon_data(endpoint, params, headers, priority, cache_key=key, strict=strict)
+    finally:
+        karbon_cache.release(key)
+
+def _cache_key(endpoint: str, params: Optional[dict]) -> str:
+    query = urlencode(sorted((params or {}).items()))
+    return f"{endpoint}?{query}" if query else endpoint
+
+async def _fetch_karbon_data(endpoint: str, params: dict = None, headers: dict = None,
+                             priority: str = quota.INTERACTIVE, cache_key: str = None, strict: bool = False):
+    """Fetch ``endpoint`` from Karbon.
+
+    On failure the lenient default falls back to mock data; ``strict`` raises
+    KarbonUnavailable (or the HTTPException) instead.
+    """
     async with httpx.AsyncClient() as client:
         if headers is None:
             headers = {}
@@ -89,13 +218,22 @@ async def get_karbon_data(endpoint: str, params: dict = None, headers: dict = No
             "AccessKey": KARBON_ACCESS_KEY
         })
         try:
+            if karbon_quota:
+                waited = await karbon_quota.acquire_async(priority)
+                if waited:
+                    logger.info(f"Waited {waited:.2f}s for the shared Karbon request budget")
             logger.info(f"Sending request to Karbon API: {KARBON_API_BASE_URL}{endpoint}")
+            started = time.perf_counter()
             response = await client.get(f"{KARBON_API_BASE_URL}{endpoint}", headers=headers, params=params)
+            metrics.record_request(endpoint, response.status_code, time.perf_counter() - started, len(response.content))
             logger.info(f"Received response from Karbon API. Status code: {response.status_code}")
 
             if response.status_code == 200:
                 logger.info(f"Successfully fetched data from {endpoint}")
-                return response.json()
+                payload = response.json()
+                if cache_key:
+                    karbon_cache.set(cache_key, payload, KARBON_CACHE_TTL_SECONDS)
+                return payload
             elif response.status_code == 401:
                 logger.error("Unauthorized access to Karbon API")
                 raise HTTPException(status_code=401, detail="Unauthorized access to Karbon API")
@@ -104,14 +242,464 @@ async def get_karbon_data(endpoint: str, params: dict = None, headers: dict = No
                 raise HTTPException(status_code=404, detail=f"Endpoint {endpoint} not found in Karbon API")
             else:
                 logger.error(f"Unexpected status code {response.status_code} from Karbon API")
+                if karbon_quota and response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After", "")
+                    karbon_quota.backoff(float(retry_after) if retry_after.isdigit() else 1.0)
+                if strict:
+                    raise KarbonUnavailable(f"Karbon returned status {response.status_code} for {endpoint}")
                 return get_mock_billing_data()  # Return mock data for testing purposes
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error occurred: {e}")
+            if strict:
+                raise KarbonUnavailable(f"HTTP error for {endpoint}: {e}") from e
             return get_mock_billing_data()  # Return mock data for testing purposes
         except Exception as e:
+            if strict and isinstance(e, (KarbonUnavailable, HTTPException)):
+                raise
             logger.error(f"An error occurred: {e}")
+            if strict:
+                raise KarbonUnavailable(f"Request to {endpoint} failed: {type(e).__name__}: {e}") from e
             return get_mock_billing_data()  # Return mock data for testing purposes
 
+def _karbon_items(payload):
+    """Items of a Karbon response: an OData ``value`` list or an already-built list."""
+    if isinstance(payload, dict):
+        return payload.get("value", [])
+    return payload or []
+
+def _minutes_to_hours(minutes):
+    return (minutes or 0) / 60
+
+def to_work_items(payload) -> List[WorkItem]:
+    items = []
+    for item in _karbon_items(payload):
+        if isinstance(item, WorkItem):
+            items.append(item)
+        elif isinstance(item, dict):
+            items.append(WorkItem(
+                id=item.get("WorkItemKey") or item.get("WorkKey") or "",
+                name=item.get("Title", ""),
+                status=item.get("PrimaryStatus") or item.get("Status") or "",
+                budgeted_hours=_minutes_to_hours(item.get("BudgetedMinutes")),
+                actual_hours=_minutes_to_hours(item.get("ActualMinutes")),
+                client_id=item.get("ClientKey"),
+            ))
+    return items
+
+def to_time_entries(payload) -> List[TimeEntry]:
+    """Flatten Karbon timesheets (with expanded TimeEntries) into TimeEntry rows."""
+    entries = []
+    for item in _karbon_items(payload):
+        if isinstance(item, TimeEntry):
+            entries.append(item)
+        elif isinstance(item, dict):
+            for index, entry in enumerate(item.get("TimeEntries", [])):
+                entries.append(TimeEntry(
+                    id=entry.get("TimeEntryKey") or f"{item.get('TimesheetKey')}-{index}",
+                    work_item_id=entry.get("WorkItemKey") or entry.get("EntityKey") or "",
+                    hours=_minutes_to_hours(entry.get("Minutes")),
+                    date=(entry.get("Date") or item.get("StartDate"))[:10],
+                    user=item.get("UserKey", ""),
+                ))
+    return entries
+
+def to_contacts(payload) -> List[Contact]:
+    contacts = []
+    for item in _karbon_items(payload):
+        if isinstance(item, Contact):
+            contacts.append(item)
+        elif isinstance(item, dict):
+            contacts.append(Contact(id=item.get("ContactKey", ""), name=item.get("FullName", "")))
+    return contacts
+
+@lru_cache(maxsize=None)
+def _adapter(model_type) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+def typed_response(model_type, value, response: Optional[Response] = None, exclude_none: bool = False) -> Response:
+    """Serialize models built by this service straight to JSON bytes.
+
+    FastAPI would dump them to dicts, validate those against ``response_model`` and
+    encode the result again; data we constructed ourselves does not need that round trip.
+    Headers already set on the injected ``response`` are carried over.
+    """
+    headers = None
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return Response(content=_adapter(model_type).dump_json(value, exclude_none=exclude_none),
+                    media_type="application/json", headers=headers)
+
+def _date_params(start_date: Optional[date], end_date: Optional[date]) -> dict:
+    params = {}
+    if start_date:
+        params['startDate'] = start_date.isoformat()
+    if end_date:
+        params['endDate'] = end_date.isoformat()
+    return params
+
+def _encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, endpoint: str) -> dict:
+    """Cursor state for ``endpoint``; rejects cursors minted for another endpoint or tampered links."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        state = None
+    if not isinstance(state, dict) or state.get("e") != endpoint:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    next_link = state.get("n")
+    if next_link is not None and not (isinstance(next_link, str) and next_link.lower().startswith(endpoint.lower() + "?")):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return state
+
+async def get_karbon_page(endpoint: str, params: dict, limit: int, cursor: Optional[str]):
+    """One upstream page of ``endpoint`` and the cursor for the next one (None on the last page).
+
+    The cursor wraps Karbon's ``@odata.nextLink``, so the page size chosen on the first
+    request carries through the whole walk and every page costs one upstream fetch.
+    """
+    state = _decode_cursor(cursor, endpoint) if cursor else {"e": endpoint}
+    if DEBUG_MODE:
+        # Mock data has no upstream paging; walk it by offset instead
+        items = await get_karbon_data(endpoint, params)
+        offset, limit = state.get("o", 0), state.get("l", limit)
+        more = offset + limit < len(items)
+        return items[offset:offset + limit], _encode_cursor({"e": endpoint, "o": offset + limit, "l": limit}) if more else None
+
+    if "n" in state:
+        payload = await get_karbon_data(state["n"])
+    else:
+        payload = await get_karbon_data(endpoint, {**params, "$top": limit})
+    next_link = _next_link(payload)
+    if not next_link:
+        return payload, None
+    return payload, _encode_cursor({"e": endpoint, "n": next_link})
+
+def _next_link(payload) -> Optional[str]:
+    """Path and query of a payload's ``@odata.nextLink``, fetchable through get_karbon_data."""
+    next_link = payload.get("@odata.nextLink") if isinstance(payload, dict) else None
+    if not next_link:
+        return None
+    parts = urlsplit(next_link)
+    return f"{parts.path}?{parts.query}"
+
+async def get_all_karbon_items(endpoint: str, params: dict = None, priority: str = quota.BATCH) -> list:
+    """Every item of ``endpoint``, following ``@odata.nextLink`` to the last page.
+
+    Strict: any failed page raises instead of yielding mock data, so callers
+    never mistake an outage for an empty result.
+    """
+    if DEBUG_MODE:
+        return await get_karbon_data(endpoint, params)
+    items = []
+    payload = await get_karbon_data(endpoint, params, priority=priority, strict=True)
+    while True:
+        if not isinstance(payload, dict) or not isinstance(payload.get("value"), list):
+            raise KarbonUnavailable(f"Unexpected payload from {endpoint}")
+        items.extend(payload["value"])
+        next_link = _next_link(payload)
+        if not next_link:
+            return items
+        payload = await get_karbon_data(next_link, priority=priority, strict=True)
+
+def _set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+def _group_by(items, key) -> dict:
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+def build_budget_to_actual(work_items: List[WorkItem], time_entries: List[TimeEntry],
+                           entries_by_work_item: Optional[dict] = None) -> List[BudgetToActualReport]:
+    if entries_by_work_item is None:
+        entries_by_work_item = _group_by(time_entries, lambda entry: entry.work_item_id)
+
+    reports = []
+    for work_item in work_items:
+        related_time_entries = entries_by_work_item.get(work_item.id, [])
+        total_actual_hours = sum((entry.hours for entry in related_time_entries), 0.0)
+        reports.append(BudgetToActualReport.model_construct(
+            work_item=work_item,
+            time_entries=related_time_entries,
+            total_actual_hours=total_actual_hours,
+            budget_variance=work_item.budgeted_hours - total_actual_hours
+        ))
+    return reports
+
+BATCH_KEY_TYPES = ("client", "worker")
+MAX_BATCH_KEYS = 500
+
+def build_budget_to_actual_sections(work_items: List[WorkItem], time_entries: List[TimeEntry],
+                                    key_type: str, keys: List[str]) -> List[BudgetToActualSection]:
+    """One budget-to-actual section per client or worker key, indexing the shared data once.
+
+    A client section covers the client's work items and all their entries; a worker
+    section covers the work items the worker logged time on, with only their entries.
+    """
+    sections = []
+    if key_type == "client":
+        entries_by_work_item = _group_by(time_entries, lambda entry: entry.work_item_id)
+        work_items_by_client = _group_by(work_items, lambda item: item.client_id)
+        for key in keys:
+            sections.append(build_budget_to_actual(work_items_by_client.get(key, []), (), entries_by_work_item))
+    else:
+        work_items_by_id = {item.id: item for item in work_items}
+        entries_by_user = _group_by(time_entries, lambda entry: entry.user)
+        for key in keys:
+            entries = entries_by_user.get(key, [])
+            touched = dict.fromkeys(entry.work_item_id for entry in entries)
+            sections.append(build_budget_to_actual(
+                [work_items_by_id[work_item_id] for work_item_id in touched if work_item_id in work_items_by_id], entries))
+    return [
+        BudgetToActualSection.model_construct(
+            key=key, total_actual_hours=sum((report.total_actual_hours for report in reports), 0.0), reports=reports)
+        for key, reports in zip(keys, sections)
+    ]
+
+TIMESHEET_GROUPS = ("user", "work_item_id", "day", "week", "month")
+TIMESHEET_METRICS = ("sum_hours", "count", "avg_hours")
+
+def _date_bucket(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def _parse_choices(value: Optional[str], allowed, name: str) -> List[str]:
+    choices = [item.strip() for item in (value or "").split(",") if item.strip()]
+    unknown = [item for item in choices if item not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {name} {', '.join(unknown)}; expected {', '.join(allowed)}")
+    return choices
+
+def aggregate_time_entries(time_entries: List[TimeEntry], group_by: List[str], selected_metrics: List[str]) -> List[TimesheetAggregate]:
+    """Sum/count entries per group in one pass; at most one date bucket (day, week or month) applies."""
+    buckets = [field for field in group_by if field in ("day", "week", "month")]
+    if len(buckets) > 1:
+        raise HTTPException(status_code=400, detail="Group by at most one of day, week, month")
+    bucket = buckets[0] if buckets else None
+    fields = [field for field in group_by if field in ("user", "work_item_id")]
+
+    totals = {}
+    for entry in time_entries:
+        key = tuple(getattr(entry, field) for field in fields) + ((_date_bucket(entry.date, bucket),) if bucket else ())
+        hours, count = totals.get(key, (0.0, 0))
+        totals[key] = (hours + entry.hours, count + 1)
+
+    rows = []
+    for key, (hours, count) in sorted(totals.items()):
+        values = dict(zip(fields, key))
+        if bucket:
+            values["period"] = key[-1]
+        if "sum_hours" in selected_metrics:
+            values["sum_hours"] = hours
+        if "count" in selected_metrics:
+            values["count"] = count
+        if "avg_hours" in selected_metrics:
+            values["avg_hours"] = hours / count
+        rows.append(TimesheetAggregate.model_construct(**values))
+    return rows
+
+def _rollup_rows(time_entries: List[TimeEntry], key) -> List[RollupRow]:
+    totals = {}
+    for entry in time_entries:
+        hours, count = totals.get(key(entry), (0.0, 0))
+        totals[key(entry)] = (hours + entry.hours, count + 1)
+    return [RollupRow.model_construct(key=k, total_hours=h, entry_count=c) for k, (h, c) in sorted(totals.items())]
+
+def build_rollup(time_entries: List[TimeEntry], start_date: date, end_date: date) -> RollupReport:
+    return RollupReport.model_construct(
+        start_date=start_date,
+        end_date=end_date,
+        total_hours=sum((entry.hours for entry in time_entries), 0.0),
+        by_user=_rollup_rows(time_entries, lambda entry: entry.user),
+        by_work_item=_rollup_rows(time_entries, lambda entry: entry.work_item_id),
+    )
+
+async def refresh_reports():
+    """Pull Karbon data for the refresh window and materialize the reports into the store.
+
+    Every page is fetched before anything is written, so a failed fetch raises
+    and leaves the previous reports in place.
+    """
+    end_date = date.today()
+    start_date = end_date - timedelta(days=REFRESH_WINDOW_DAYS)
+    logger.info(f"Refreshing materialized reports for {start_date} to {end_date}")
+
+    with metrics.stage("refresh_fetch"):
+        work_items, timesheets, contacts = await asyncio.gather(
+            get_all_karbon_items("/v3/WorkItems"),
+            get_all_karbon_items("/v3/timesheets", _date_params(start_date, end_date)),
+            get_all_karbon_items("/v3/Contacts"),
+        )
+    with metrics.stage("refresh_materialize"):
+        work_items = to_work_items(work_items)
+        # Entry ids per timesheet let webhook notifications patch a single timesheet's entries
+        time_entries, timesheet_entries = [], {}
+        for timesheet in _karbon_items(timesheets):
+            entries = to_time_entries([timesheet])
+            time_entries.extend(entries)
+            if isinstance(timesheet, dict):
+                timesheet_entries[timesheet.get("TimesheetKey")] = [entry.id for entry in entries]
+
+        # One transaction: workers sharing the store never see a window without its data and reports
+        report_store.put_many({
+            "work_items": [item.model_dump(mode="json") for item in work_items],
+            "time_entries": [entry.model_dump(mode="json") for entry in time_entries],
+            "timesheet_entries": timesheet_entries,
+            "contacts": [contact.model_dump(mode="json") for contact in to_contacts(contacts)],
+            **materialize_reports(work_items, time_entries, start_date, end_date),
+            "window": {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()},
+        })
+
+def materialize_reports(work_items: List[WorkItem], time_entries: List[TimeEntry], start_date: date, end_date: date) -> dict:
+    """Stored payloads of the reports built from the window's work items and entries."""
+    return {
+        "budget_to_actual": [
+            report.model_dump(mode="json") for report in build_budget_to_actual(work_items, time_entries)
+        ],
+        "rollup": build_rollup(time_entries, start_date, end_date).model_dump(mode="json"),
+    }
+
+refresh_scheduler = RefreshScheduler(refresh_reports, REFRESH_INTERVAL_SECONDS)
+
+def _materialized_window():
+    """(start, end) covered by the last refresh, or None before the first one completes."""
+    window = report_store.get_json("window")
+    if not window:
+        return None
+    return date.fromisoformat(window["start_date"]), date.fromisoformat(window["end_date"])
+
+def _freshness_headers(refreshed_at: float) -> dict:
+    return {
+        "X-Report-Source": "materialized",
+        "X-Refreshed-At": datetime.fromtimestamp(refreshed_at, timezone.utc).isoformat(),
+        "X-Data-Age-Seconds": f"{time.time() - refreshed_at:.0f}",
+    }
+
+def _derived_version(names, *parts) -> tuple:
+    """(etag, refreshed_at) of a report computed from stored payloads; it changes only when they do."""
+    versions = [report_store.version(name) for name in names]
+    key = ":".join([etag for etag, _ in versions] + [str(part) for part in parts])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest(), max(refreshed_at for _, refreshed_at in versions)
+
+def _validator_headers(etag: str, refreshed_at: float) -> dict:
+    headers = _freshness_headers(refreshed_at)
+    headers["ETag"] = f'"{etag}"'
+    headers["Last-Modified"] = formatdate(refreshed_at, usegmt=True)
+    return headers
+
+def _not_modified(request: Request, etag: str, refreshed_at: Optional[float] = None) -> bool:
+    """Whether the client's copy is current; If-None-Match takes precedence over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or f'"{etag}"' in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and refreshed_at is not None:
+        try:
+            return int(refreshed_at) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def _materialized_entries(start_date: date, end_date: date, rows: Optional[list] = None) -> List[TimeEntry]:
+    """Stored time entries (or the given entry rows) dated within the range."""
+    if rows is None:
+        rows = report_store.get_json("time_entries") or []
+    return [
+        TimeEntry.model_construct(**{**entry, "date": date.fromisoformat(entry["date"])})
+        for entry in rows
+        if start_date.isoformat() <= entry["date"] <= end_date.isoformat()
+    ]
+
+WEBHOOK_RESOURCES = {
+    "WorkItem": "/v3/WorkItems",
+    "Contact": "/v3/Contacts",
+    "Timesheet": "/v3/timesheets",
+}
+
+class WebhookNotification(BaseModel):
+    ResourcePermaKey: str
+    ResourceType: str
+    ActionType: str = "Updated"
+    TimeStamp: Optional[str] = None
+
+def _replace_rows(name: str, key: str, rows: list) -> list:
+    return [row for row in report_store.get_json(name) or [] if row["id"] != key] + rows
+
+async def patch_materialized(resource_type: str, key: str, action: str) -> bool:
+    """Apply one changed entity to the materialized datasets and rebuild the reports from them.
+
+    Returns False when the change cannot be patched in place (the entity could not be
+    fetched, or the store predates the timesheet index) and a full refresh is needed.
+    """
+    window = _materialized_window()
+    if window is None:
+        return True
+    payload = None
+    if action != "Deleted":
+        params = {"$expand": "TimeEntries"} if resource_type == "Timesheet" else None
+        try:
+            payload = await get_karbon_data(f"{WEBHOOK_RESOURCES[resource_type]}/{key}", params, priority=quota.BATCH)
+        except HTTPException:
+            return False
+        if not isinstance(payload, dict):
+            return False
+
+    # No awaits from here on, so the read-modify-write cannot interleave with a refresh
+    if resource_type == "Contact":
+        contacts = to_contacts([payload]) if payload else []
+        report_store.put("contacts", _replace_rows("contacts", key, [contact.model_dump(mode="json") for contact in contacts]))
+        return True
+    updates = {}
+    if resource_type == "WorkItem":
+        work_items = to_work_items([payload]) if payload else []
+        updates["work_items"] = _replace_rows("work_items", key, [item.model_dump(mode="json") for item in work_items])
+    else:
+        index = report_store.get_json("timesheet_entries")
+        if index is None:
+            return False
+        index = dict(index)
+        start_date, end_date = window
+        entries = [entry for entry in to_time_entries([payload]) if start_date <= entry.date <= end_date] if payload else []
+        stale = set(index.pop(key, [])) | {entry.id for entry in entries}
+        rows = [row for row in report_store.get_json("time_entries") or [] if row["id"] not in stale]
+        rows += [entry.model_dump(mode="json") for entry in entries]
+        if entries:
+            index[key] = [entry.id for entry in entries]
+        updates["time_entries"] = rows
+        updates["timesheet_entries"] = index
+
+    # The patched dataset and the reports built from it are stored together
+    start_date, end_date = window
+    work_item_rows = updates["work_items"] if "work_items" in updates else report_store.get_json("work_items")
+    work_items = [WorkItem.model_construct(**item) for item in work_item_rows]
+    time_entries = _materialized_entries(start_date, end_date, updates.get("time_entries"))
+    report_store.put_many({**updates, **materialize_reports(work_items, time_entries, start_date, end_date)})
+    return True
+
+async def apply_webhook(notifications: List[WebhookNotification]):
+    changes = dict.fromkeys((n.ResourceType, n.ResourcePermaKey, n.ActionType) for n in notifications)
+    refresh_needed = False
+    for resource_type, key, action in changes:
+        logger.info(f"Karbon webhook: {resource_type} {key} {action}")
+        if karbon_cache is not None:
+            # Collection and entity responses for the resource are keyed under its endpoint
+            karbon_cache.delete_prefix(WEBHOOK_RESOURCES[resource_type])
+        with metrics.stage("webhook_patch"):
+            if not await patch_materialized(resource_type, key, action):
+                refresh_needed = True
+    if refresh_needed:
+        logger.info("Webhook change could not be patched in place; refreshing materialized reports")
+        await refresh_scheduler.run_once()
+
 async def authenticate(authorization: str = Header(None), access_key: str = Header(None, alias="AccessKey")):
     logger.info("Starting authentication process")
     logger.info(f"Received headers: {dict(authorization=authorization, AccessKey=access_key)}")
@@ -153,65 +741,267 @@ async def authenticate(authorization: str = Header(None), access_key: str = Head
 
 @app.get("/api/billing", response_model=List[BillingItem])
 async def get_billing_data(
+    request: Request,
+    response: Response,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     authenticated: bool = Depends(authenticate)
 ):
-    logger.info(f"Received request for billing data: start_date={start_date}, end_date={end_date}")
-    params = {}
-    if start_date:
-        params['startDate'] = start_date.isoformat()
-    if end_date:
-        params['endDate'] = end_date.isoformat()
-    return await get_karbon_data("/v3/billing", params)
+    logger.info(f"Received request for billing data: start_date={start_date}, end_date={end_date}, "
+                f"limit={limit}, cursor={cursor}")
+    params = _date_params(start_date, end_date)
+    if limit is None and cursor is None:
+        return await get_karbon_data("/v3/billing", params)
+    payload, next_cursor = await get_karbon_page("/v3/billing", params, limit or MAX_PAGE_SIZE, cursor)
+    _set_next_cursor(request, response, next_cursor)
+    return _karbon_items(payload)
 
 @app.get("/api/work-items", response_model=List[WorkItem])
 async def get_work_items(
+    request: Request,
+    response: Response,
     status: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
     authenticated: bool = Depends(authenticate)
 ):
-    logger.info(f"Received request for work items: status={status}")
+    logger.info(f"Received request for work items: status={status}, limit={limit}, cursor={cursor}")
     params = {'status': status} if status else {}
-    return await get_karbon_data("/v3/WorkItems", params)
+    if limit is None and cursor is None:
+        return typed_response(List[WorkItem], to_work_items(await get_karbon_data("/v3/WorkItems", params)))
+    payload, next_cursor = await get_karbon_page("/v3/WorkItems", params, limit or MAX_PAGE_SIZE, cursor)
+    _set_next_cursor(request, response, next_cursor)
+    return typed_response(List[WorkItem], to_work_items(payload), response)
 
-@app.get("/api/timesheets", response_model=List[TimeEntry])
+@app.get("/api/timesheets", response_model=Union[List[TimeEntry], List[TimesheetAggregate]], response_model_exclude_none=True)
 async def get_timesheets(
+    request: Request,
+    response: Response,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
+    group_by: Optional[str] = Query(None, description="Comma-separated: user, work_item_id, day, week, month"),
+    metric_names: Optional[str] = Query(None, alias="metrics",
+                                        description="Comma-separated: sum_hours, count, avg_hours (default sum_hours,count)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Timesheets per page; their entries are flattened"),
+    cursor: Optional[str] = Query(None),
     authenticated: bool = Depends(authenticate)
 ):
-    logger.info(f"Received request for timesheets: start_date={start_date}, end_date={end_date}")
-    params = {}
-    if start_date:
-        params['startDate'] = start_date.isoformat()
-    if end_date:
-        params['endDate'] = end_date.isoformat()
-    return await get_karbon_data("/v3/timesheets", params)
+    logger.info(f"Received request for timesheets: start_date={start_date}, end_date={end_date}, "
+                f"group_by={group_by}, metrics={metric_names}, limit={limit}, cursor={cursor}")
+    groups = _parse_choices(group_by, TIMESHEET_GROUPS, "group_by")
+    selected_metrics = _parse_choices(metric_names, TIMESHEET_METRICS, "metrics")
+    if limit is not None or cursor is not None:
+        if groups or selected_metrics:
+            raise HTTPException(status_code=400, detail="limit/cursor page raw entries and cannot be combined with group_by or metrics")
+        payload, next_cursor = await get_karbon_page("/v3/timesheets", _date_params(start_date, end_date),
+                                                     limit or MAX_PAGE_SIZE, cursor)
+        _set_next_cursor(request, response, next_cursor)
+        return typed_response(List[TimeEntry], to_time_entries(payload), response)
+    if not groups and not selected_metrics:
+        time_entries = to_time_entries(await get_karbon_data("/v3/timesheets", _date_params(start_date, end_date)))
+        return typed_response(List[TimeEntry], time_entries)
+
+    # Totals must cover every entry: read the materialized window when it holds the range,
+    # otherwise walk every upstream page
+    window = _materialized_window()
+    if window and start_date and end_date and window[0] <= start_date and end_date <= window[1]:
+        response.headers.update(_freshness_headers(report_store.version("time_entries")[1]))
+        time_entries = _materialized_entries(start_date, end_date)
+    else:
+        response.headers["X-Report-Source"] = "live"
+        try:
+            timesheets = await get_all_karbon_items("/v3/timesheets", _date_params(start_date, end_date),
+                                                    priority=quota.INTERACTIVE)
+        except KarbonUnavailable as e:
+            raise HTTPException(status_code=502, detail=str(e))
+        time_entries = to_time_entries(timesheets)
+    # Aggregate on the service so dashboard tiles receive totals instead of every entry
+    rows = aggregate_time_entries(time_entries, groups, selected_metrics or ["sum_hours", "count"])
+    return typed_response(List[TimesheetAggregate], rows, response, exclude_none=True)
 
 @app.get("/api/budget-to-actual", response_model=List[BudgetToActualReport])
 async def get_budget_to_actual(
+    request: Request,
+    response: Response,
     start_date: date = Query(...),
     end_date: date = Query(...),
     authenticated: bool = Depends(authenticate)
 ):
     logger.info(f"Received request for budget-to-actual report: start_date={start_date}, end_date={end_date}")
-    work_items = await get_work_items()
-    timesheets = await get_timesheets(start_date=start_date, end_date=end_date)
-
-    reports = []
-    for work_item in work_items:
-        related_time_entries = [entry for entry in timesheets if entry.work_item_id == work_item.id]
-        total_actual_hours = sum(entry.hours for entry in related_time_entries)
-        budget_variance = work_item.budgeted_hours - total_actual_hours
-
-        reports.append(BudgetToActualReport(
-            work_item=work_item,
-            time_entries=related_time_entries,
-            total_actual_hours=total_actual_hours,
-            budget_variance=budget_variance
-        ))
-
-    return reports
+    window = _materialized_window()
+    if window and window[0] <= start_date and end_date <= window[1]:
+        # Polling clients revalidate against the stored versions before anything is loaded or built
+        if (start_date, end_date) == window:
+            version = report_store.version("budget_to_actual")
+            if _not_modified(request, *version):
+                return Response(status_code=304, headers=_validator_headers(*version))
+            stored = report_store.get("budget_to_actual")
+            return Response(content=stored.body, media_type="application/json",
+                            headers=_validator_headers(stored.etag, stored.refreshed_at))
+        version = _derived_version(("work_items", "time_entries"), "budget_to_actual", start_date, end_date)
+        if _not_modified(request, *version):
+            return Response(status_code=304, headers=_validator_headers(*version))
+        response.headers.update(_validator_headers(*version))
+        work_items = [WorkItem.model_construct(**item) for item in report_store.get_json("work_items")]
+        reports = build_budget_to_actual(work_items, _materialized_entries(start_date, end_date))
+        return typed_response(List[BudgetToActualReport], reports, response)
+
+    # Outside the materialized window: compute live against Karbon; the ETag still spares the transfer
+    work_items, timesheets = await asyncio.gather(
+        get_karbon_data("/v3/WorkItems"),
+        get_karbon_data("/v3/timesheets", _date_params(start_date, end_date)),
+    )
+    reports = build_budget_to_actual(to_work_items(work_items), to_time_entries(timesheets))
+    body = _adapter(List[BudgetToActualReport]).dump_json(reports)
+    etag = hashlib.sha1(body).hexdigest()
+    headers = {"X-Report-Source": "live", "ETag": f'"{etag}"'}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/budget-to-actual/batch", response_model=List[BudgetToActualSection])
+async def get_budget_to_actual_batch(
+    request: Request,
+    response: Response,
+    key_type: str = Query(..., description="client or worker"),
+    keys: str = Query(..., description="Comma-separated client or worker keys"),
+    start_date: date = Query(...),
+    end_date: date = Query(...),
+    authenticated: bool = Depends(authenticate)
+):
+    logger.info(f"Received request for batch budget-to-actual report: key_type={key_type}, keys={keys}, "
+                f"start_date={start_date}, end_date={end_date}")
+    if key_type not in BATCH_KEY_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown key_type {key_type}; expected {', '.join(BATCH_KEY_TYPES)}")
+    key_list = list(dict.fromkeys(key.strip() for key in keys.split(",") if key.strip()))
+    if not key_list or len(key_list) > MAX_BATCH_KEYS:
+        raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_BATCH_KEYS} keys")
+
+    # Work items and timesheets are loaded once for every key in the batch
+    window = _materialized_window()
+    if window and window[0] <= start_date and end_date <= window[1]:
+        version = _derived_version(("work_items", "time_entries"), "budget_to_actual_batch",
+                                   key_type, start_date, end_date, *key_list)
+        if _not_modified(request, *version):
+            return Response(status_code=304, headers=_validator_headers(*version))
+        response.headers.update(_validator_headers(*version))
+        work_items = [WorkItem.model_construct(**item) for item in report_store.get_json("work_items")]
+        sections = build_budget_to_actual_sections(
+            work_items, _materialized_entries(start_date, end_date), key_type, key_list)
+        return typed_response(List[BudgetToActualSection], sections, response)
+
+    # Computed live, like the single-report endpoint; the ETag still spares the transfer
+    work_items, timesheets = await asyncio.gather(
+        get_karbon_data("/v3/WorkItems"),
+        get_karbon_data("/v3/timesheets", _date_params(start_date, end_date)),
+    )
+    sections = build_budget_to_actual_sections(
+        to_work_items(work_items), to_time_entries(timesheets), key_type, key_list)
+    body = _adapter(List[BudgetToActualSection]).dump_json(sections)
+    etag = hashlib.sha1(body).hexdigest()
+    headers = {"X-Report-Source": "live", "ETag": f'"{etag}"'}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/rollup", response_model=RollupReport)
+async def get_rollup(
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    authenticated: bool = Depends(authenticate)
+):
+    logger.info(f"Received request for rollup report: start_date={start_date}, end_date={end_date}")
+    window = _materialized_window()
+    if window is None:
+        raise HTTPException(status_code=503, detail="Reports have not been materialized yet")
+    start_date, end_date = start_date or window[0], end_date or window[1]
+    if start_date < window[0] or end_date > window[1]:
+        raise HTTPException(status_code=400, detail=f"Rollup is available for {window[0]} to {window[1]}")
+
+    if (start_date, end_date) == window:
+        version = report_store.version("rollup")
+        if _not_modified(request, *version):
+            return Response(status_code=304, headers=_validator_headers(*version))
+        stored = report_store.get("rollup")
+        return Response(content=stored.body, media_type="application/json",
+                        headers=_validator_headers(stored.etag, stored.refreshed_at))
+    version = _derived_version(("time_entries",), "rollup", start_date, end_date)
+    if _not_modified(request, *version):
+        return Response(status_code=304, headers=_validator_headers(*version))
+    response.headers.update(_validator_headers(*version))
+    return typed_response(RollupReport, build_rollup(_materialized_entries(start_date, end_date), start_date, end_date), response)
+
+@app.post("/api/webhooks/karbon", status_code=202)
+async def receive_karbon_webhook(
+    background_tasks: BackgroundTasks,
+    notifications: Union[WebhookNotification, List[WebhookNotification]],
+    token: Optional[str] = Query(None),
+    webhook_token: Optional[str] = Header(None, alias="X-Webhook-Token"),
+):
+    # Karbon cannot send our API credentials, so the subscription URL or header carries a shared secret
+    if not DEBUG_MODE:
+        if not KARBON_WEBHOOK_SECRET:
+            raise HTTPException(status_code=503, detail="Webhook receiver is not configured")
+        if not hmac.compare_digest((token or webhook_token or "").encode(), KARBON_WEBHOOK_SECRET.encode()):
+            raise HTTPException(status_code=401, detail="Invalid webhook token")
+
+    if isinstance(notifications, WebhookNotification):
+        notifications = [notifications]
+    accepted = [n for n in notifications if n.ResourceType in WEBHOOK_RESOURCES]
+    logger.info(f"Received {len(notifications)} Karbon webhook notifications, {len(accepted)} for cached resources")
+    # Acknowledge right away; invalidation and patching run after the response is sent
+    background_tasks.add_task(apply_webhook, accepted)
+    return {"accepted": len(accepted), "ignored": len(notifications) - len(accepted)}
+
+@app.get("/api/refresh-status")
+async def get_refresh_status(authenticated: bool = Depends(authenticate)):
+    window = _materialized_window()
+    return {
+        "scheduler": refresh_scheduler.status(),
+        "window": {"start_date": window[0], "end_date": window[1]} if window else None,
+        "reports": report_store.freshness(),
+    }
+
+@app.post("/api/refresh")
+async def trigger_refresh(authenticated: bool = Depends(authenticate)):
+    await refresh_scheduler.run_once()
+    return refresh_scheduler.status()
+
+@app.get("/api/query")
+def query_entries(
+    contact: Optional[str] = Query(None),
+    worker: Optional[str] = Query(None),
+    task: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    group_by: str = Query("task", description="Comma-separated: contact, worker, task, date, month"),
+    authenticated: bool = Depends(authenticate)
+):
+    """Ad hoc hour totals from the local entries snapshot or database; no Karbon calls."""
+    logger.info(f"Received entries query: contact={contact}, worker={worker}, task={task}, "
+                f"start_date={start_date}, end_date={end_date}, group_by={group_by}")
+    columns = tuple(column for column in group_by.split(",") if column)
+    try:
+        if ENTRIES_SNAPSHOT_PATH and os.path.exists(ENTRIES_SNAPSHOT_PATH):
+            return entries_snapshot.query(ENTRIES_SNAPSHOT_PATH, contact, worker, task, start_date, end_date, columns)
+        if not os.path.exists(ENTRIES_DB_PATH):
+            raise HTTPException(status_code=503, detail="Entries database has not been loaded yet")
+        return entries_query.query(ENTRIES_DB_PATH, contact, worker, task, start_date, end_date, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authenticated: bool = Depends(authenticate)):
+    """Service metrics in Prometheus text format, plus the last batch run report if configured."""
+    text = prometheus_text(metrics.snapshot())
+    if RUN_REPORT_PATH and os.path.exists(RUN_REPORT_PATH):
+        with open(RUN_REPORT_PATH) as f:
+            text += prometheus_text(json.load(f), prefix="karbon_batch")
+    return PlainTextResponse(text)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,43 @@
+"""Post sample Karbon webhook notifications to a running service.
+
+    python post_webhook.py --token $KARBON_WEBHOOK_SECRET WorkItem:4ndLvTfS3Mc Timesheet:2KqX7Rw:Deleted
+
+Each change is RESOURCE_TYPE:KEY[:ACTION] (ACTION defaults to Updated). They are
+sent as one batch, the way Karbon delivers bursts of notifications.
+"""
+import argparse
+import sys
+from datetime import datetime, timezone
+
+import httpx
+
+
+def build_notifications(changes):
+    notifications = []
+    for change in changes:
+        resource_type, key, *action = change.split(":")
+        notifications.append({
+            "ResourcePermaKey": key,
+            "ResourceType": resource_type,
+            "ActionType": action[0] if action else "Updated",
+            "TimeStamp": datetime.now(timezone.utc).isoformat(),
+        })
+    return notifications
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post sample Karbon webhook notifications to the service.")
+    parser.add_argument("changes", nargs="+", metavar="TYPE:KEY[:ACTION]",
+                        help="e.g. WorkItem:4ndLvTfS3Mc, Contact:3Pq9:Deleted")
+    parser.add_argument("--url", default="http://localhost:8000/api/webhooks/karbon")
+    parser.add_argument("--token", help="KARBON_WEBHOOK_SECRET of the service")
+    args = parser.parse_args(argv)
+
+    headers = {"X-Webhook-Token": args.token} if args.token else {}
+    response = httpx.post(args.url, json=build_notifications(args.changes), headers=headers)
+    print(f"{response.status_code} {response.text}")
+    return 0 if response.status_code < 300 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Runs an async refresh job on a fixed interval in the service's event loop."""
+
+    def __init__(self, job: Callable[[], Awaitable[None]], interval: float):
+        self.job = job
+        self.interval = interval
+        self.last_started: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def run_once(self):
+        # Overlapping triggers (timer plus a manual refresh) share one run
+        async with self._lock:
+            self.last_started = time.time()
+            try:
+                await self.job()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Background refresh failed")
+            else:
+                self.last_success = time.time()
+                self.last_error = None
+            finally:
+                self.last_duration = time.time() - self.last_started
+
+    async def _loop(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        next_run = None
+        if self._task is not None and self.last_started is not None:
+            next_run = self.last_started + (self.last_duration or 0) + self.interval
+        return {
+            "interval_seconds": self.interval,
+            "running": self._task is not None,
+            "last_started": self.last_started,
+            "last_success": self.last_success,
+            "last_duration_seconds": self.last_duration,
+            "last_error": self.last_error,
+            "next_run": next_run,
+        }
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+
+class StoredReport(NamedTuple):
+    name: str
+    body: str
+    refreshed_at: float
+    etag: str
+
+
+class ReportStore:
+    """SQLite-backed store for materialized datasets and reports.
+
+    Payloads are kept as serialized JSON so endpoints can return the stored
+    body as-is; decoded copies are memoized per refresh. Each payload carries
+    a content hash so conditional requests can be answered from ``version``
+    without reading the body.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._decoded = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            " name TEXT PRIMARY KEY, body TEXT NOT NULL, refreshed_at REAL NOT NULL,"
+            " etag TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}
+        if "etag" not in columns:
+            # Stores written before content hashes existed: add the column and hash existing rows
+            self._conn.create_function("sha1", 1, lambda body: hashlib.sha1(body.encode("utf-8")).hexdigest())
+            self._conn.execute("ALTER TABLE reports ADD COLUMN etag TEXT NOT NULL DEFAULT ''")
+            self._conn.execute("UPDATE reports SET etag = sha1(body)")
+        self._conn.commit()
+
+    def put(self, name: str, payload: Any) -> StoredReport:
+        return self.put_many({name: payload})[name]
+
+    def put_many(self, payloads: dict) -> dict:
+        """Store several payloads in one transaction, so readers never see some without the others."""
+        now = time.time()
+        reports = {}
+        for name, payload in payloads.items():
+            body = json.dumps(payload, default=str, separators=(",", ":"))
+            reports[name] = StoredReport(name, body, now, hashlib.sha1(body.encode("utf-8")).hexdigest())
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO reports (name, body, refreshed_at, etag) VALUES (?, ?, ?, ?)",
+                    reports.values(),
+                )
+            for name in reports:
+                self._decoded.pop(name, None)
+        return reports
+
+    def get(self, name: str) -> Optional[StoredReport]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, body, refreshed_at, etag FROM reports WHERE name = ?", (name,)
+            ).fetchone()
+        return StoredReport(*row) if row else None
+
+    def version(self, name: str) -> Optional[tuple]:
+        """(etag, refreshed_at) of a stored payload, without loading its body."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, refreshed_at FROM reports WHERE name = ?", (name,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def get_json(self, name: str) -> Optional[Any]:
+        report = self.get(name)
+        if report is None:
+            return None
+        cached = self._decoded.get(name)
+        if cached and cached[0] == report.refreshed_at:
+            return cached[1]
+        value = json.loads(report.body)
+        self._decoded[name] = (report.refreshed_at, value)
+        return value
+
+    def freshness(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, refreshed_at FROM reports").fetchall()
+        return {name: refreshed_at for name, refreshed_at in rows}
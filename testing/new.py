@@ -1,25 +1,42 @@
 import http.client
 import json
 import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from config import KARBON_BEARER_TOKEN, KARBON_ACCESS_KEY  # Import access token and key
 
 # Constants
 API_BASE_URL = "api.karbonhq.com"
+RESOLVE_WORKERS = 8  # Concurrent lookups when resolving user/client/entity names
+
+# One keep-alive connection per worker thread
+_local = threading.local()
+
+def _get_connection():
+    if getattr(_local, "conn", None) is None:
+        _local.conn = http.client.HTTPSConnection(API_BASE_URL)
+    return _local.conn
+
+def _send(method, endpoint, headers):
+    conn = _get_connection()
+    conn.request(method, endpoint, headers=headers)
+    response = conn.getresponse()
+    return response, response.read().decode('utf-8')
 
 # Helper function to make HTTP requests using http.client
 def make_http_request(method, endpoint):
-    conn = http.client.HTTPSConnection(API_BASE_URL)
-    
     headers = {
         'AccessKey': KARBON_ACCESS_KEY,
         'Authorization': f'Bearer {KARBON_BEARER_TOKEN}',
         'Content-Type': 'application/json'
     }
-    
-    conn.request(method, endpoint, headers=headers)
-    response = conn.getresponse()
-    data = response.read().decode('utf-8')
-    conn.close()
+
+    try:
+        response, data = _send(method, endpoint, headers)
+    except (OSError, http.client.HTTPException):
+        # The server may have dropped the idle connection; retry once on a fresh one
+        _local.conn = None
+        response, data = _send(method, endpoint, headers)
 
     if response.status == 200:
         return json.loads(data)
@@ -61,9 +78,34 @@ def fetch_timesheets():
         print("No timesheets found.")
         return []
 
-# Function to format timesheet data
-def format_timesheet(timesheet):
-    user_name = get_user_name(timesheet["UserKey"])
+# Collect the unique User, Client and Entity keys referenced by the timesheets
+def collect_keys(timesheets):
+    user_keys, client_keys, entity_keys = set(), set(), set()
+    for timesheet in timesheets:
+        user_keys.add(timesheet.get("UserKey"))
+        for entry in timesheet.get("TimeEntries", []):
+            client_keys.add(entry.get("ClientKey"))
+            entity_keys.add(entry.get("EntityKey"))
+    return user_keys, client_keys, entity_keys
+
+# Look up each unique key once, concurrently; returns {key: name}
+def resolve_names(keys, get_name):
+    keys = [key for key in keys if key]
+    with ThreadPoolExecutor(max_workers=RESOLVE_WORKERS) as executor:
+        return dict(zip(keys, executor.map(get_name, keys)))
+
+# Resolve every name the timesheets need before formatting them
+def resolve_timesheet_names(timesheets):
+    user_keys, client_keys, entity_keys = collect_keys(timesheets)
+    return {
+        "users": resolve_names(user_keys, get_user_name),
+        "clients": resolve_names(client_keys, get_client_name),
+        "entities": resolve_names(entity_keys, get_entity_name),
+    }
+
+# Function to format timesheet data from already-resolved name maps
+def format_timesheet(timesheet, names):
+    user_name = names["users"].get(timesheet.get("UserKey"), "Unknown User")
     formatted_timesheet = {
         "Timesheet ID": timesheet.get("TimesheetKey"),
         "Start Date": timesheet.get("StartDate"),
@@ -75,8 +117,8 @@ def format_timesheet(timesheet):
 
     # Process each time entry in the timesheet
     for entry in timesheet.get("TimeEntries", []):
-        client_name = get_client_name(entry["ClientKey"])
-        entity_name = get_entity_name(entry["EntityKey"])
+        client_name = names["clients"].get(entry.get("ClientKey"), "Unknown Client")
+        entity_name = names["entities"].get(entry.get("EntityKey"), "Unknown Entity")
 
         formatted_entry = {
             "Task Type": entry.get("TaskTypeName", "Unknown Task"),
@@ -100,8 +142,9 @@ def main():
         print("No timesheets found.")
         return
 
+    names = resolve_timesheet_names(timesheets)
     for timesheet in timesheets:
-        formatted_data = format_timesheet(timesheet)
+        formatted_data = format_timesheet(timesheet, names)
         formatted_timesheets.append(formatted_data)
 
     # Save the formatted data as a JSON file